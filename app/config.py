@@ -0,0 +1,24 @@
+"""
+Process-level runtime settings read from the environment.
+
+Shared by routes that must behave differently in production (e.g. debug-only
+endpoints and App Store debug verification).
+"""
+
+import functools
+import os
+
+
+@functools.lru_cache(maxsize=1)
+def runtime_env() -> str:
+    return (
+        os.getenv("APP_ENV")
+        or os.getenv("ENV")
+        or os.getenv("ENVIRONMENT")
+        or "development"
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def is_production_runtime() -> bool:
+    return runtime_env().lower() == "production"
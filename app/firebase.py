@@ -20,6 +20,22 @@ if not firebase_admin._apps:
         else:
             print("WARNING: Firebase Admin not initialized - create_custom_token will fail")
 
+
+def warm_custom_token_signer():
+    """
+    Mint a throwaway custom token so firebase_admin resolves and caches its
+    signer (service-account key or IAM signBlob client) before the first login.
+    firebase_admin keeps the auth client / TokenGenerator per app, so later
+    create_custom_token calls reuse it instead of rediscovering credentials.
+    """
+    if not firebase_admin._apps:
+        return
+    try:
+        from firebase_admin import auth as fb_auth
+        fb_auth.create_custom_token("warmup")
+    except Exception as e:
+        print(f"[STARTUP WARNING] Custom token signer warm-up failed: {e}")
+
 class MockDocumentReference:
     def __init__(self, collection, id, data=None, exists=True):
         self.collection = collection
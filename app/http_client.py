@@ -0,0 +1,27 @@
+"""
+Shared outbound HTTP client.
+
+The app lifespan (app.main) creates one keep-alive httpx.AsyncClient on
+app.state.http so request handlers (e.g. /auth/line -> api.line.me, the Google
+OAuth token exchange) reuse connections instead of a fresh TCP+TLS handshake
+per call.
+"""
+
+import httpx
+from fastapi import Request
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(5.0, connect=2.0),
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+    )
+
+
+def http_client(request: Request) -> httpx.AsyncClient:
+    """Shared keep-alive client created in the app lifespan (lazily if lifespan did not run)."""
+    client = getattr(request.app.state, "http", None)
+    if client is None:
+        client = create_http_client()
+        request.app.state.http = client
+    return client
@@ -1,9 +1,13 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+import asyncio
 import json
 import logging
 import os
+from app.firebase import warm_custom_token_signer
+from app.http_client import create_http_client
 from app.services.ops_logger import OpsLogger, Severity, EventType
 from app.services.metrics import track_api_request
 from app.services.profiling import (
@@ -65,7 +69,22 @@ except Exception as e:
     print(f"WARNING: Unexpected error importing usage router: {e}")
     usage_router_available = False
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared outbound HTTP client so request handlers (e.g. /auth/line -> api.line.me)
+    # reuse keep-alive connections instead of a fresh TCP+TLS handshake per call.
+    app.state.http = create_http_client()
+    # Prime the custom-token signer so the first /auth/line doesn't pay for
+    # credential discovery on top of its own signing call.
+    if os.getenv("USE_MOCK_DB", "0") != "1":
+        await asyncio.to_thread(warm_custom_token_signer)
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
 app = FastAPI(
+    lifespan=lifespan,
     title="DeepNote API",
     description="Backend API for DeepNote - AI-powered recording and transcription app.",
     version="1.0.0",
@@ -6,6 +6,7 @@ import logging
 from app.dependencies import get_current_user, CurrentUser
 from app.services.account import account_id_from_phone
 from app.firebase import db
+from app.routes.auth import invalidate_canonical_cache, invalidate_pointer_cache
 from app.task_queue import enqueue_nuke_user_task
 
 logger = logging.getLogger("app.account")
@@ -177,6 +178,8 @@ def link_phone(user: CurrentUser = Depends(get_current_user)):
     transaction = db.transaction()
     try:
         final_result = txn_attach(transaction)
+        invalidate_pointer_cache("phone_numbers", phone)
+        invalidate_canonical_cache(uid)
     except Exception as e:
         logger.error(f"Transaction failed for {uid}: {e}")
         # traceback.print_exc()
@@ -290,6 +293,7 @@ if os.environ.get("ENV") != "production":
             "isVerified": True, # Ensure it stays verified or reset if needed, keeping true here.
             "updatedAt": datetime.now(timezone.utc)
         })
+        invalidate_pointer_cache("phone_numbers", phone_e164)
         return {"ok": True, "message": f"Released ownership for {phone_e164}"}
 
 # ---------- Account Merge ----------
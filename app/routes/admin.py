@@ -9,6 +9,7 @@ from app.admin_auth import get_current_admin_user
 from app.services.ops_logger import OpsLogger, EventType, Severity
 from app.services.metrics import MetricsService, MetricName
 from app.services.job_manager import job_manager, JobStatus, ErrorCategory, can_retry
+from app.routes.auth import invalidate_pointer_cache
 from firebase_admin import auth as firebase_auth
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -668,6 +669,7 @@ async def purge_user(uid: str, admin_user: dict = Depends(get_current_admin_user
         if p_doc.exists and p_doc.to_dict().get("standardOwnerUid") == uid:
             # Release or Delete? "Delete from beginning" implies delete.
             p_ref.delete() 
+            invalidate_pointer_cache("phone_numbers", phone)
             deleted_counts["phone_numbers"] = 1
             
     # E. User Doc (and subcollections if any, e.g. sessionMeta, subscriptions)
@@ -1,11 +1,16 @@
 import os
+import asyncio
+import hashlib
 import logging
+import functools
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header
+from fastapi.responses import Response
 
 from app.firebase import db, storage_client, AUDIO_BUCKET_NAME, MEDIA_BUCKET_NAME
-from app.dependencies import get_current_user, CurrentUser, CurrentUser, ensure_can_view, ensure_is_owner
+from app.dependencies import get_current_user, CurrentUser, ensure_can_view, ensure_is_owner
+from app.utils.etag import if_none_match_hits
 from app.routes.sessions import _session_doc_ref, _derived_doc_ref, _map_derived_status
 from app.task_queue import enqueue_summarize_task, enqueue_quiz_task
 from app.util_models import (
@@ -15,8 +20,6 @@ from app.util_models import (
     AssetResolveRequest,
     AssetResolveResponse,
     ResolvedAsset,
-    AssetResolveResponse,
-    ResolvedAsset,
     JobStatus,
     DerivedStatusResponse,
 )
@@ -25,6 +28,27 @@ from app.util_models import (
 router = APIRouter()
 logger = logging.getLogger("app.assets")
 
+# [PERF] Field mask for the manifest read. transcriptText can be megabytes and
+# the manifest only needs to know whether it exists, so it is left out here.
+_MANIFEST_FIELDS = [
+    # ACL (ensure_can_view)
+    "ownerAccountId", "ownerUid", "ownerUserId", "userId",
+    "sharedWithAccountIds", "sharedUserIds", "sharedWithUserIds", "sharedWith",
+    # Audio
+    "audioPath", "audioStatus", "audioMeta", "createdAt",
+    # Transcript presence
+    "status", "hasTranscript", "transcriptTextLen", "transcriptUpdatedAt", "updatedAt",
+    # Summary / Quiz compat fields
+    "summaryStatus", "summaryMarkdown", "summaryUpdatedAt",
+    "quizStatus", "quizMarkdown", "quizUpdatedAt",
+]
+
+
+@functools.lru_cache(maxsize=1)
+def _service_url() -> str:
+    """Base URL for self-referencing artifact links (CLOUD_RUN_SERVICE_URL)."""
+    return os.environ.get("CLOUD_RUN_SERVICE_URL", "https://api.deepnote.app")
+
 @router.get("/assets/ping", include_in_schema=False)
 async def ping_assets():
     return {"status": "ok", "msg": "Assets router is mounted"}
@@ -147,12 +171,13 @@ def _get_audio_asset(data: dict) -> Optional[AssetItem]:
 
     # Extract metadata if available
     meta = data.get("audioMeta") or {}
+    container = meta.get("container")
     
     return AssetItem(
         status=status,
         version=1,
         updatedAt=data.get("createdAt"), # Fallback
-        contentType=meta.get("container") and f"audio/{meta['container']}" or "audio/mp4",
+        contentType=f"audio/{container}" if container else "audio/mp4",
         sizeBytes=meta.get("sizeBytes"),
         sha256=meta.get("payloadSha256"),
         error=None 
@@ -166,7 +191,7 @@ async def get_session_assets(session_id: str, current_user: CurrentUser = Depend
     Tells client what exists and its status.
     """
     doc_ref = _session_doc_ref(session_id)
-    doc = doc_ref.get()
+    doc = doc_ref.get(field_paths=_MANIFEST_FIELDS)
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -193,10 +218,15 @@ async def get_session_assets(session_id: str, current_user: CurrentUser = Depend
     
     # 2. Transcript (Special: currently only in session doc)
     # Future: _derived_doc_ref(session_id, "transcribe")
-    trans_text = data.get("transcriptText")
+    # Prefer the denormalized flags (transcriptText writers and wipers keep them in
+    # step); sessions without them fall back to checking the text itself.
+    has_transcript = bool(data.get("hasTranscript")) or bool(data.get("transcriptTextLen"))
+    if not has_transcript:
+        text_doc = doc_ref.get(field_paths=["transcriptText"])
+        has_transcript = bool((text_doc.to_dict() or {}).get("transcriptText"))
     session_status = data.get("status", "")
 
-    if trans_text:
+    if has_transcript:
         # Transcript exists and is ready
         manifest.transcript = AssetItem(
             status=AssetStatus.READY,
@@ -270,7 +300,9 @@ async def resolve_session_assets(
             # If path is "imports/..." or "sessions/..."
             if gcs_path:
                 blob = storage_client.bucket(AUDIO_BUCKET_NAME).blob(gcs_path)
-                url = blob.generate_signed_url(
+                # [PERF] V4 signing is an RSA sign (or IAM signBlob RPC); keep it off the event loop
+                url = await asyncio.to_thread(
+                    blob.generate_signed_url,
                     version="v4",
                     expiration=expiration,
                     method="PUT", # Assuming client needs to PUT (upload)
@@ -278,11 +310,12 @@ async def resolve_session_assets(
                 
                 # Meta
                 meta = data.get("audioMeta") or {}
+                container = meta.get("container")
                 resolved = ResolvedAsset(
                     url=url,
                     expiresAt=datetime.now(timezone.utc) + expiration,
                     sha256=meta.get("payloadSha256"),
-                    contentType=meta.get("container") and f"audio/{meta['container']}" or "audio/mp4"
+                    contentType=f"audio/{container}" if container else "audio/mp4"
                 )
                 
         # For Text Assets (Summary, Transcript, Quiz), we have a dilemma:
@@ -313,7 +346,7 @@ async def resolve_session_assets(
              # Check availability
              # (Reuse logic or just construct URL)
                   # Use CLOUD_RUN_SERVICE_URL from environment for self-referencing URLs
-                  service_url = os.environ.get("CLOUD_RUN_SERVICE_URL", "https://api.deepnote.app")
+                  service_url = _service_url()
                   resolved = ResolvedAsset(
                       url=f"{service_url}/sessions/{session_id}/artifacts/{type_key}?format=json",
                       contentType="application/json",
@@ -338,24 +371,20 @@ async def ensure_asset_generation(
     If ready or processing, does nothing.
     """
     doc_ref = _session_doc_ref(session_id)
-    doc = doc_ref.get()
+    # [PERF] Only the requested asset's derived doc matters here; fetch it
+    # alongside the session doc instead of pulling every derived doc.
+    doc, derived_snap = await asyncio.gather(
+        asyncio.to_thread(doc_ref.get),
+        asyncio.to_thread(_derived_doc_ref(session_id, asset_type).get),
+    )
     if not doc.exists:
         raise HTTPException(404, "Session not found")
     data = doc.to_dict()
     ensure_is_owner(data, current_user, session_id) # Owners only for generation
     
-    # Check current status
-    # We can use the helper _get_asset_item_from_derived logic, but simpler to check derived doc directly?
-    # Use helper to handle legacy fields correctly.
-    
-    derived_refs = [
-        _derived_doc_ref(session_id, "summary"),
-        _derived_doc_ref(session_id, "quiz"),
-        _derived_doc_ref(session_id, "playlist"),
-    ]
-    derived_snaps = db.get_all(derived_refs)
-    derived_map = {s.id: s.to_dict() for s in derived_snaps if s.exists}
-    
+    # Check current status via the manifest helper so legacy session fields are
+    # still consulted when the derived doc is missing or carries no status
+    derived_map = {asset_type: derived_snap.to_dict()} if derived_snap.exists else {}
     item = _get_asset_item_from_derived(session_id, asset_type, data, derived_map)
     
     current_status = item.status if item else AssetStatus.MISSING
@@ -377,8 +406,16 @@ async def ensure_asset_generation(
 
 # We need a Transcript Artifact endpoint to match other artifacts
 @router.get("/sessions/{session_id}/artifacts/transcript", response_model=DerivedStatusResponse)
-async def get_artifact_transcript(session_id: str, current_user: CurrentUser = Depends(get_current_user)):
-    """Bridge endpoint for Transcript as Artifact."""
+async def get_artifact_transcript(
+    session_id: str,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    """
+    Bridge endpoint for Transcript as Artifact.
+    - ETag support: Return 304 Not Modified if transcript unchanged
+    """
     doc_ref = _session_doc_ref(session_id)
     doc = doc_ref.get()
     if not doc.exists:
@@ -390,6 +427,13 @@ async def get_artifact_transcript(session_id: str, current_user: CurrentUser = D
     if not text:
          return DerivedStatusResponse(status=JobStatus.PENDING) # or MISSING
          
+    # [PERF] Transcripts can be megabytes; let clients revalidate with If-None-Match
+    etag = f'"{hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()}"'
+    if if_none_match_hits(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=300"
     return DerivedStatusResponse(
         status=JobStatus.COMPLETED,
         result={"transcript": text},
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Header, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import requests
 import os
+import asyncio
 import logging
+import functools
+import hashlib
+import time
 from firebase_admin import auth as fb_auth
 
 from app.util_models import LineAuthRequest, LineAuthResponse
-from app.dependencies import get_current_user, CurrentUser
+from app.dependencies import get_current_user, CurrentUser, _cache_set_account_id
 from app.firebase import db
+from app.http_client import http_client
+from app.utils.etag import if_none_match_hits
 from google.cloud import firestore
+from google.api_core.exceptions import NotFound
 
 router = APIRouter()
 logger = logging.getLogger("app.auth")
@@ -31,51 +38,107 @@ class CanonicalizeResponse(BaseModel):
     providers: list[str] = []
 
 import httpx
+import jwt
+
+
+@functools.lru_cache(maxsize=1)
+def _line_client_id() -> str | None:
+    """LINE_CHANNEL_ID is fixed for the lifetime of the process; read it once."""
+    return os.environ.get("LINE_CHANNEL_ID")
+
+
+# LINE ID tokens issued to native apps / LINE SDK are ES256 JWTs whose keys are
+# published at this JWKS endpoint. PyJWKClient caches the key set in-process.
+LINE_JWKS_URL = "https://api.line.me/oauth2/v2.1/certs"
+LINE_ISSUER = "https://access.line.me"
+_LINE_JWKS_ALGORITHMS = ["ES256", "RS256"]
+_line_jwks_client = jwt.PyJWKClient(LINE_JWKS_URL, cache_keys=True, lifespan=3600)
+
+
+def _verify_line_id_token_locally(id_token: str, client_id: str, nonce: str | None) -> dict | None:
+    """
+    Verify a LINE ID token against the cached JWKS without calling api.line.me/verify.
+
+    Returns the verified claims, or None when local verification is not possible
+    or fails (HS256 web-login tokens, unknown kid, JWKS fetch error, bad claims) so
+    the caller can fall back to the remote verify endpoint, which stays authoritative.
+    """
+    try:
+        header = jwt.get_unverified_header(id_token)
+    except jwt.InvalidTokenError as e:
+        logger.info("[/auth/line] Unparseable token header, falling back to LINE verify: %s", e)
+        return None
+    # HS256 web-login tokens are signed with the channel secret and have no JWKS key;
+    # asking PyJWKClient for one would refetch the key set synchronously on every call
+    if header.get("alg") not in _LINE_JWKS_ALGORITHMS or not header.get("kid"):
+        return None
+
+    try:
+        signing_key = _line_jwks_client.get_signing_key(header["kid"])
+        claims = jwt.decode(
+            id_token,
+            signing_key.key,
+            algorithms=_LINE_JWKS_ALGORITHMS,
+            audience=client_id,
+            issuer=LINE_ISSUER,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+    except Exception as e:
+        logger.info("[/auth/line] Local token verification unavailable, falling back to LINE verify: %s", e)
+        return None
+    if nonce and claims.get("nonce") != nonce:
+        logger.info("[/auth/line] Nonce mismatch in local verification, falling back to LINE verify")
+        return None
+    return claims
+
 
 @router.post("/auth/line", response_model=LineAuthResponse)
-async def auth_line(req: LineAuthRequest):
-    LINE_CLIENT_ID = os.environ.get("LINE_CHANNEL_ID")
-    logger.info(f"[/auth/line] Configured LINE_CHANNEL_ID: {LINE_CLIENT_ID}") 
+async def auth_line(req: LineAuthRequest, request: Request):
+    LINE_CLIENT_ID = _line_client_id()
+    logger.info("[/auth/line] Configured LINE_CHANNEL_ID: %s", LINE_CLIENT_ID) 
     
     if not LINE_CLIENT_ID:
         logger.warning("LINE_CHANNEL_ID is not set in environment")
         return JSONResponse(status_code=500, content={"detail": "Server misconfiguration: missing LINE_CHANNEL_ID"})
 
     # DEBUG: Decode token to see what client sent
-    try:
-        import jwt
-        unverified_payload = jwt.decode(req.idToken, options={"verify_signature": False})
-        logger.info(f"[/auth/line] Incoming Token Claims: aud={unverified_payload.get('aud')}, iss={unverified_payload.get('iss')}, exp={unverified_payload.get('exp')}")
-    except Exception as decode_err:
-        logger.error(f"[/auth/line] Failed to decode token for debug: {decode_err}")
+    # [PERF] Skipped at INFO so production doesn't parse the JWT an extra time
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            unverified_payload = jwt.decode(req.idToken, options={"verify_signature": False})
+            logger.debug("[/auth/line] Incoming Token Claims: aud=%s, iss=%s, exp=%s", unverified_payload.get('aud'), unverified_payload.get('iss'), unverified_payload.get('exp'))
+        except Exception as decode_err:
+            logger.debug("[/auth/line] Failed to decode token for debug: %s", decode_err)
 
-    logger.info(f"[/auth/line] Verifying LINE token with ID: {LINE_CLIENT_ID}")
-    
-    async with httpx.AsyncClient() as client:
+    logger.info("[/auth/line] Verifying LINE token with ID: %s", LINE_CLIENT_ID)
+
+    # [PERF] Verify the signature locally against cached JWKS; JWKS refresh is sync I/O
+    payload = await asyncio.to_thread(_verify_line_id_token_locally, req.idToken, LINE_CLIENT_ID, req.nonce)
+
+    if payload is None:
         try:
-            verify_resp = await client.post(
+            verify_resp = await http_client(request).post(
                 "https://api.line.me/oauth2/v2.1/verify",
                 data={
                     "id_token": req.idToken,
                     "client_id": LINE_CLIENT_ID,
                     "nonce": req.nonce,
                 },
-                timeout=5.0
             )
         except httpx.TimeoutException:
             logger.error("LINE token verification timed out")
             raise HTTPException(status_code=503, detail="LINE server timeout")
-    
-    if verify_resp.status_code != 200:
-        logger.error(f"LINE verify failed: status={verify_resp.status_code}, body={verify_resp.text}")
-        raise HTTPException(status_code=401, detail=f"Invalid LINE token. Server expects aud={LINE_CLIENT_ID}. LINE Error: {verify_resp.text}")
 
-    payload = verify_resp.json()
+        if verify_resp.status_code != 200:
+            logger.error("LINE verify failed: status=%s, body=%s", verify_resp.status_code, verify_resp.text)
+            raise HTTPException(status_code=401, detail=f"Invalid LINE token. Server expects aud={LINE_CLIENT_ID}. LINE Error: {verify_resp.text}")
+
+        payload = verify_resp.json()
     line_user_id = payload.get("sub")
     name = payload.get("name")
     picture = payload.get("picture")
     
-    logger.info(f"[/auth/line] LINE user verified: sub={line_user_id}, name={name}")
+    logger.info("[/auth/line] LINE user verified: sub=%s, name=%s, aud=%s, exp=%s", line_user_id, name, payload.get('aud'), payload.get('exp'))
     
     if not line_user_id:
         raise HTTPException(status_code=401, detail="No sub in LINE token")
@@ -84,7 +147,9 @@ async def auth_line(req: LineAuthRequest):
     firebase_uid = f"line:{line_user_id}"
     
     try:
-        custom_token_bytes = fb_auth.create_custom_token(
+        # [PERF] Token signing is an RSA sign (or IAM signBlob RPC); keep it off the event loop
+        custom_token_bytes = await asyncio.to_thread(
+            fb_auth.create_custom_token,
             firebase_uid,
             {
                 "provider": "line",
@@ -93,84 +158,206 @@ async def auth_line(req: LineAuthRequest):
             }
         )
         custom_token = custom_token_bytes.decode("utf-8")
-        logger.info(f"[/auth/line] Custom token created for uid={firebase_uid}")
+        logger.info("[/auth/line] Custom token created for uid=%s", firebase_uid)
     except Exception as e:
-        logger.exception(f"Failed to create custom token for uid={firebase_uid}")
+        logger.exception("Failed to create custom token for uid=%s", firebase_uid)
         raise HTTPException(status_code=500, detail="Failed to create custom token")
 
     return LineAuthResponse(firebaseCustomToken=custom_token)
 
 
-from datetime import datetime, timezone
+# [PERF] uid -> (accountId, token phone, expire_at) of the last no-op canonicalize served
+# by this instance. Repeat calls within the TTL skip pointer resolution and the
+# lastLoginAt write, and only re-read users/{uid} + accounts/{accountId} in one
+# BatchGetDocuments, so plan and profile fields are always current. Entries are dropped on
+# every canonicalize write path and when /me/apple_app_account_token changes the uid's
+# pointer; the TTL bounds staleness from identity writes made elsewhere (other instances).
+_CANONICAL_CACHE: dict[str, tuple[str, str | None, float]] = {}
+_CANONICAL_CACHE_TTL = 60
+_CANONICAL_CACHE_MAX_SIZE = 5000
+
+
+def _canonical_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def _cache_get_canonical(uid: str, token_phone: str | None) -> str | None:
+    """Return the cached accountId if unexpired and resolved for the same phone claim."""
+    entry = _CANONICAL_CACHE.get(uid)
+    if entry is None:
+        return None
+    account_id, cached_phone, expire_at = entry
+    if time.monotonic() > expire_at or cached_phone != token_phone:
+        _CANONICAL_CACHE.pop(uid, None)
+        return None
+    return account_id
+
+
+def _cache_set_canonical(uid: str, token_phone: str | None, account_id: str) -> None:
+    if len(_CANONICAL_CACHE) >= _CANONICAL_CACHE_MAX_SIZE:
+        now = time.monotonic()
+        for k in [k for k, entry in _CANONICAL_CACHE.items() if now > entry[2]]:
+            _CANONICAL_CACHE.pop(k, None)
+    if len(_CANONICAL_CACHE) >= _CANONICAL_CACHE_MAX_SIZE:
+        # Still full: drop the oldest 20%
+        for k in list(_CANONICAL_CACHE.keys())[:_CANONICAL_CACHE_MAX_SIZE // 5]:
+            _CANONICAL_CACHE.pop(k, None)
+    _CANONICAL_CACHE[uid] = (account_id, token_phone, time.monotonic() + _CANONICAL_CACHE_TTL)
+
+
+def invalidate_canonical_cache(uid: str) -> None:
+    _CANONICAL_CACHE.pop(uid, None)
+
+
+# [PERF] (collection, doc id) -> (accountId or None, expire_at) for the identity pointer
+# collections (phone_numbers, apple_app_account_tokens). They change rarely but are read
+# on every canonicalize. Misses are cached too, for a shorter TTL. The route handlers that
+# write these docs call invalidate_pointer_cache() after the write. The cache is
+# per-instance, so writes on other instances, by background cleanup
+# (services.session_cleanup) and by out-of-band scripts are bounded by the
+# TTL, which is safe because a canonicalize based on a stale pointer is corrected by the
+# next call.
+_POINTER_CACHE: dict[tuple[str, str], tuple[str | None, float]] = {}
+_POINTER_CACHE_TTL = 300
+_POINTER_NEGATIVE_TTL = 60
+_POINTER_CACHE_MAX_SIZE = 50000
+_POINTER_MISS = object()
+
+
+def _pointer_cache_get(collection: str, doc_id: str):
+    """Return the cached accountId (None for a cached miss), or _POINTER_MISS."""
+    entry = _POINTER_CACHE.get((collection, doc_id))
+    if entry is None:
+        return _POINTER_MISS
+    account_id, expire_at = entry
+    if time.monotonic() > expire_at:
+        _POINTER_CACHE.pop((collection, doc_id), None)
+        return _POINTER_MISS
+    return account_id
+
+
+def _pointer_cache_set(collection: str, doc_id: str, account_id: str | None) -> None:
+    if len(_POINTER_CACHE) >= _POINTER_CACHE_MAX_SIZE:
+        now = time.monotonic()
+        for k in [k for k, (_, exp) in _POINTER_CACHE.items() if now > exp]:
+            _POINTER_CACHE.pop(k, None)
+    if len(_POINTER_CACHE) >= _POINTER_CACHE_MAX_SIZE:
+        # Still full: drop the oldest 20%
+        for k in list(_POINTER_CACHE.keys())[:_POINTER_CACHE_MAX_SIZE // 5]:
+            _POINTER_CACHE.pop(k, None)
+    ttl = _POINTER_CACHE_TTL if account_id else _POINTER_NEGATIVE_TTL
+    _POINTER_CACHE[(collection, doc_id)] = (account_id, time.monotonic() + ttl)
+
+
+def invalidate_pointer_cache(collection: str, doc_id: str | None) -> None:
+    if doc_id:
+        _POINTER_CACHE.pop((collection, doc_id), None)
+
+
+# (uid, token phone) -> in-flight canonicalize resolution
+_CANONICALIZE_INFLIGHT: dict[tuple[str, str | None], asyncio.Future] = {}
+
+
+def _get_all_by_path(refs: list) -> dict:
+    """Fetch refs with one db.get_all() call; snapshots keyed by document path (order is not guaranteed)."""
+    return {snap.reference.path: snap for snap in db.get_all(refs)}
 
 
 def _merge_uid_into_account_sync(uid: str, target_account_id: str, source_account_id: str | None = None) -> dict:
     """
     [Account Unification] Merge a uid into target_account_id (non-transactional version for auth.py).
+    The link, membership and users/{uid} writes go out as one WriteBatch. If an account
+    doc is missing the batch fails as a whole and is rebuilt and recommitted once after
+    checking which account exists. The source-account tombstone is a separate, later
+    update, so the merge as a whole is not atomic: a crash between the two commits
+    leaves an empty source account without mergedInto.
     """
-    now = datetime.now(timezone.utc)
-
-    # 1. Update uid_links to point to target account
-    db.collection("uid_links").document(uid).set({
-        "uid": uid,
-        "accountId": target_account_id,
-        "linkedAt": now,
-        "mergedFrom": source_account_id,
-        "mergeReason": "canonicalize_token_match"
-    }, merge=True)
-
-    # 2. Add uid to target account's memberUids
+    invalidate_canonical_cache(uid)
     target_acc_ref = db.collection("accounts").document(target_account_id)
-    target_acc_snap = target_acc_ref.get()
-    if target_acc_snap.exists:
-        target_data = target_acc_snap.to_dict() or {}
-        member_uids = set(target_data.get("memberUids", []))
-        member_uids.add(uid)
-        target_acc_ref.update({
-            "memberUids": list(member_uids),
-            "updatedAt": now
-        })
-    else:
-        target_acc_ref.set({
-            "memberUids": [uid],
-            "primaryUid": uid,
-            "plan": "free",
-            "createdAt": now,
-            "updatedAt": now
-        })
-
-    # 3. Remove uid from source account's memberUids (if different)
+    source_acc_ref = None
     if source_account_id and source_account_id != target_account_id:
         source_acc_ref = db.collection("accounts").document(source_account_id)
-        source_acc_snap = source_acc_ref.get()
-        if source_acc_snap.exists:
-            source_data = source_acc_snap.to_dict() or {}
-            source_members = [m for m in source_data.get("memberUids", []) if m != uid]
-            if len(source_members) == 0:
-                source_acc_ref.update({
-                    "memberUids": [],
-                    "mergedInto": target_account_id,
-                    "mergedAt": now,
-                    "updatedAt": now
-                })
-            else:
-                source_acc_ref.update({
-                    "memberUids": source_members,
-                    "updatedAt": now
-                })
-
-    # 4. Update users/{uid}.accountId
-    db.collection("users").document(uid).set({
-        "accountId": target_account_id,
-        "updatedAt": now
-    }, merge=True)
+
+    def _build_batch(create_target: bool, include_source: bool):
+        batch = db.batch()
+
+        # 1. Update uid_links to point to target account
+        batch.set(db.collection("uid_links").document(uid), {
+            "uid": uid,
+            "accountId": target_account_id,
+            "linkedAt": firestore.SERVER_TIMESTAMP,
+            "mergedFrom": source_account_id,
+            "mergeReason": "canonicalize_token_match"
+        }, merge=True)
+
+        # 2. Add uid to target account's memberUids (server-side ArrayUnion, no read needed)
+        if create_target:
+            batch.set(target_acc_ref, {
+                "memberUids": [uid],
+                "primaryUid": uid,
+                "plan": "free",
+                "createdAt": firestore.SERVER_TIMESTAMP,
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            })
+        else:
+            batch.update(target_acc_ref, {
+                "memberUids": firestore.ArrayUnion([uid]),
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            })
+
+        # 3. Remove uid from source account's memberUids (server-side ArrayRemove, no read needed)
+        if include_source:
+            batch.update(source_acc_ref, {
+                "memberUids": firestore.ArrayRemove([uid]),
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            })
+
+        # 4. Update users/{uid}.accountId
+        batch.set(db.collection("users").document(uid), {
+            "accountId": target_account_id,
+            "updatedAt": firestore.SERVER_TIMESTAMP
+        }, merge=True)
+        return batch
+
+    try:
+        _build_batch(create_target=False, include_source=source_acc_ref is not None).commit()
+    except NotFound:
+        # The target and/or source account doc is missing, so the batch wrote nothing.
+        # Rare path: check which one and recommit accordingly.
+        refs = [target_acc_ref] + ([source_acc_ref] if source_acc_ref is not None else [])
+        snaps = _get_all_by_path(refs)
+        source_exists = source_acc_ref is not None and snaps[source_acc_ref.path].exists
+        _build_batch(
+            create_target=not snaps[target_acc_ref.path].exists,
+            include_source=source_exists,
+        ).commit()
+        if not source_exists:
+            source_acc_ref = None
+
+    # The uid now points at the merged account. Refresh the caches only after the
+    # commit, and drop any canonical entry a concurrent request filled meanwhile.
+    invalidate_canonical_cache(uid)
+    _cache_set_account_id(uid, target_account_id)
+
+    # 5. Tombstone the source account once its last member is gone. Only the
+    #    (masked) memberUids field is read, and only when there was a source.
+    if source_acc_ref is not None:
+        source_snap = source_acc_ref.get(field_paths=["memberUids"])
+        if source_snap.exists and not (source_snap.to_dict() or {}).get("memberUids"):
+            source_acc_ref.update({
+                "mergedInto": target_account_id,
+                "mergedAt": firestore.SERVER_TIMESTAMP,
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            })
 
     return {"changed": True, "from": source_account_id, "to": target_account_id}
 
 
 @router.post("/auth/canonicalize", response_model=CanonicalizeResponse)
 async def canonicalize_user(
+    response: Response,
     current_user: CurrentUser = Depends(get_current_user),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
 ):
     """
     [Account Unification] Canonicalize user identity.
@@ -184,42 +371,117 @@ async def canonicalize_user(
     """
     uid = current_user.uid
     token_phone = current_user.phone_number
-    now = datetime.now(timezone.utc)
 
-    # Get current user data
-    user_doc = db.collection("users").document(uid).get()
-    user_data = user_doc.to_dict() if user_doc.exists else {}
+    # [PERF] Unchanged identity within the TTL: skip resolution, re-read only the
+    # plan/profile docs the response is built from
+    cached_account_id = _cache_get_canonical(uid, token_phone)
+    if cached_account_id is not None:
+        user_ref = db.collection("users").document(uid)
+        acc_ref = db.collection("accounts").document(cached_account_id)
+        snaps = await asyncio.to_thread(_get_all_by_path, [user_ref, acc_ref])
+        user_doc, acc_doc = snaps[user_ref.path], snaps[acc_ref.path]
+        body = _already_canonical_response(
+            current_user,
+            cached_account_id,
+            user_doc.to_dict() if user_doc.exists else {},
+            acc_doc.to_dict() if acc_doc.exists else {},
+        ).model_dump_json().encode("utf-8")
+        etag = _canonical_etag(body)
+        if if_none_match_hits(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    # [PERF] Single-flight: concurrent calls for the same identity (app resume double-fire)
+    # share one resolution instead of racing each other through the merge writes.
+    # shield() lets the shared run finish even if the caller that started it disconnects.
+    key = (uid, token_phone)
+    task = _CANONICALIZE_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_canonicalize_uncached(current_user))
+        _CANONICALIZE_INFLIGHT[key] = task
+
+        def _on_done(t: asyncio.Future) -> None:
+            _CANONICALIZE_INFLIGHT.pop(key, None)
+            # Retrieve the exception here: if every awaiting caller was cancelled,
+            # nobody else will, and asyncio would log "exception was never retrieved"
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_on_done)
+    resp, etag = await asyncio.shield(task)
+    if etag:
+        # The client may still hold this ETag from another instance or an expired entry
+        if if_none_match_hits(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+    return resp
+
+
+async def _canonicalize_uncached(current_user: CurrentUser) -> tuple[CanonicalizeResponse, str | None]:
+    """Resolve and persist the canonical account; returns the response and, for no-op results, its ETag."""
+    uid = current_user.uid
+    token_phone = current_user.phone_number
 
-    # Get current accountId from uid_links
-    link_doc = db.collection("uid_links").document(uid).get()
+    # Any path below may write; don't let a stale entry outlive it
+    invalidate_canonical_cache(uid)
+
+    # [PERF] users/{uid}, uid_links/{uid} and (when the token carries a phone number)
+    # phone_numbers/{phone} are independent, so fetch them in a single BatchGetDocuments RPC.
+    user_ref = db.collection("users").document(uid)
+    link_ref = db.collection("uid_links").document(uid)
+    # [PERF] Pointer lookups answered by the in-process pointer cache skip Firestore
+    pointer_refs = {}
+    cached_pointers = {}
+    if token_phone:
+        cached = _pointer_cache_get("phone_numbers", token_phone)
+        if cached is _POINTER_MISS:
+            pointer_refs["phone_number"] = db.collection("phone_numbers").document(token_phone)
+        else:
+            cached_pointers["phone_number"] = cached
+    pointer_snaps = await asyncio.to_thread(_get_all_by_path, [user_ref, link_ref, *pointer_refs.values()])
+    user_doc, link_doc = pointer_snaps[user_ref.path], pointer_snaps[link_ref.path]
+    user_data = user_doc.to_dict() if user_doc.exists else {}
     link_data = link_doc.to_dict() if link_doc.exists else {}
     current_account_id = link_data.get("accountId") or user_data.get("accountId")
 
     target_account_id = None
     resolution_method = None
 
-    # Priority 1: appAccountToken lookup (strongest - same device = same person)
+    # Only the appAccountToken pointer depends on users/{uid}; it needs a second read
     app_token = user_data.get("appleAppAccountToken")
     if app_token:
-        token_doc = db.collection("apple_app_account_tokens").document(app_token).get()
-        if token_doc.exists:
-            token_data = token_doc.to_dict() or {}
-            mapped_account_id = token_data.get("accountId")
-            if mapped_account_id:
-                target_account_id = mapped_account_id
-                resolution_method = "app_account_token"
-                logger.info(f"[/auth/canonicalize] Found account {target_account_id} by appAccountToken")
+        cached = _pointer_cache_get("apple_app_account_tokens", app_token)
+        if cached is _POINTER_MISS:
+            pointer_refs["app_account_token"] = db.collection("apple_app_account_tokens").document(app_token)
+            pointer_snaps.update(await asyncio.to_thread(_get_all_by_path, [pointer_refs["app_account_token"]]))
+        else:
+            cached_pointers["app_account_token"] = cached
+
+    def _pointer_account_id(method: str) -> str | None:
+        if method in cached_pointers:
+            return cached_pointers[method]
+        ref = pointer_refs.get(method)
+        snap = pointer_snaps.get(ref.path) if ref is not None else None
+        if snap is None:
+            return None
+        account_id = (snap.to_dict() or {}).get("accountId") if snap.exists else None
+        _pointer_cache_set(ref.parent.id, ref.id, account_id)
+        return account_id
+
+    # Priority 1: appAccountToken lookup (strongest - same device = same person)
+    mapped_account_id = _pointer_account_id("app_account_token")
+    if mapped_account_id:
+        target_account_id = mapped_account_id
+        resolution_method = "app_account_token"
+        logger.info("[/auth/canonicalize] Found account %s by appAccountToken", target_account_id)
 
     # Priority 2: phone number lookup
-    if not target_account_id and token_phone:
-        phone_doc = db.collection("phone_numbers").document(token_phone).get()
-        if phone_doc.exists:
-            phone_data = phone_doc.to_dict() or {}
-            mapped_account_id = phone_data.get("accountId")
-            if mapped_account_id:
-                target_account_id = mapped_account_id
-                resolution_method = "phone_number"
-                logger.info(f"[/auth/canonicalize] Found account {target_account_id} by phone {token_phone}")
+    if not target_account_id:
+        mapped_account_id = _pointer_account_id("phone_number")
+        if mapped_account_id:
+            target_account_id = mapped_account_id
+            resolution_method = "phone_number"
+            logger.info("[/auth/canonicalize] Found account %s by phone %s", target_account_id, token_phone)
 
     # Priority 3: Existing link
     if not target_account_id and current_account_id:
@@ -228,28 +490,32 @@ async def canonicalize_user(
 
     # No account found anywhere
     if not target_account_id:
-        logger.info(f"[/auth/canonicalize] No account found for uid={uid}, creating new")
+        logger.info("[/auth/canonicalize] No account found for uid=%s, creating new", uid)
         # Create new account for this user
         new_acc_ref = db.collection("accounts").document()
         target_account_id = new_acc_ref.id
-        new_acc_ref.set({
-            "primaryUid": uid,
-            "memberUids": [uid],
-            "plan": "free",
-            "createdAt": now,
-            "updatedAt": now
-        })
-        db.collection("uid_links").document(uid).set({
-            "uid": uid,
-            "accountId": target_account_id,
-            "linkedAt": now,
-            "reason": "canonicalize_created"
-        })
-        db.collection("users").document(uid).set({
-            "accountId": target_account_id,
-            "lastLoginAt": now,
-            "updatedAt": now
-        }, merge=True)
+
+        def _create_account():
+            new_acc_ref.set({
+                "primaryUid": uid,
+                "memberUids": [uid],
+                "plan": "free",
+                "createdAt": firestore.SERVER_TIMESTAMP,
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            })
+            link_ref.set({
+                "uid": uid,
+                "accountId": target_account_id,
+                "linkedAt": firestore.SERVER_TIMESTAMP,
+                "reason": "canonicalize_created"
+            })
+            user_ref.set({
+                "accountId": target_account_id,
+                "lastLoginAt": firestore.SERVER_TIMESTAMP,
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            }, merge=True)
+
+        await asyncio.to_thread(_create_account)
 
         return CanonicalizeResponse(
             canonicalized=True,
@@ -263,26 +529,26 @@ async def canonicalize_user(
             photoUrl=user_data.get("photoUrl") or current_user.photo_url,
             provider=current_user.provider,
             providers=user_data.get("providers", [current_user.provider] if current_user.provider else []),
-        )
+        ), None
 
     # Check if merge is needed
     if current_account_id and current_account_id != target_account_id:
         # Merge current uid into target account
-        logger.info(f"[/auth/canonicalize] Merging uid={uid} from {current_account_id} to {target_account_id} via {resolution_method}")
+        logger.info("[/auth/canonicalize] Merging uid=%s from %s to %s via %s", uid, current_account_id, target_account_id, resolution_method)
         try:
-            _merge_uid_into_account_sync(uid, target_account_id, current_account_id)
+            await asyncio.to_thread(_merge_uid_into_account_sync, uid, target_account_id, current_account_id)
         except Exception as e:
-            logger.error(f"[/auth/canonicalize] Merge failed: {e}")
+            logger.error("[/auth/canonicalize] Merge failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Account merge failed: {str(e)}")
 
-        # [NEW] Record last login time
-        db.collection("users").document(uid).set({
-            "lastLoginAt": now,
-            "updatedAt": now
-        }, merge=True)
-
-        # Fetch account data for response
-        acc_doc = db.collection("accounts").document(target_account_id).get()
+        # [NEW] Record last login time + fetch account data for response (independent)
+        _, acc_doc = await asyncio.gather(
+            asyncio.to_thread(user_ref.set, {
+                "lastLoginAt": firestore.SERVER_TIMESTAMP,
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            }, merge=True),
+            asyncio.to_thread(db.collection("accounts").document(target_account_id).get),
+        )
         acc_data = acc_doc.to_dict() if acc_doc.exists else {}
 
         return CanonicalizeResponse(
@@ -297,24 +563,28 @@ async def canonicalize_user(
             photoUrl=user_data.get("photoUrl") or current_user.photo_url,
             provider=current_user.provider,
             providers=acc_data.get("providers", [current_user.provider] if current_user.provider else []),
-        )
+        ), None
 
     # No merge needed - just ensure link exists
     if not link_doc.exists:
-        db.collection("uid_links").document(uid).set({
-            "uid": uid,
-            "accountId": target_account_id,
-            "linkedAt": now,
-            "reason": f"canonicalize_{resolution_method}"
-        })
-        db.collection("users").document(uid).set({
-            "accountId": target_account_id,
-            "lastLoginAt": now,
-            "updatedAt": now
-        }, merge=True)
-
-        # Fetch account data for response
-        acc_doc = db.collection("accounts").document(target_account_id).get()
+        def _write_link():
+            link_ref.set({
+                "uid": uid,
+                "accountId": target_account_id,
+                "linkedAt": firestore.SERVER_TIMESTAMP,
+                "reason": f"canonicalize_{resolution_method}"
+            })
+            user_ref.set({
+                "accountId": target_account_id,
+                "lastLoginAt": firestore.SERVER_TIMESTAMP,
+                "updatedAt": firestore.SERVER_TIMESTAMP
+            }, merge=True)
+
+        # Link writes + fetch account data for response (independent)
+        _, acc_doc = await asyncio.gather(
+            asyncio.to_thread(_write_link),
+            asyncio.to_thread(db.collection("accounts").document(target_account_id).get),
+        )
         acc_data = acc_doc.to_dict() if acc_doc.exists else {}
 
         return CanonicalizeResponse(
@@ -329,24 +599,33 @@ async def canonicalize_user(
             photoUrl=user_data.get("photoUrl") or current_user.photo_url,
             provider=current_user.provider,
             providers=acc_data.get("providers", [current_user.provider] if current_user.provider else []),
-        )
+        ), None
 
     # Already canonical
-    logger.info(f"[/auth/canonicalize] uid={uid} already linked to {target_account_id}")
+    logger.info("[/auth/canonicalize] uid=%s already linked to %s", uid, target_account_id)
+
+    # [NEW] Record last login time + fetch account data for response (independent)
+    _, acc_doc = await asyncio.gather(
+        asyncio.to_thread(user_ref.set, {
+            "lastLoginAt": firestore.SERVER_TIMESTAMP,
+            "updatedAt": firestore.SERVER_TIMESTAMP
+        }, merge=True),
+        asyncio.to_thread(db.collection("accounts").document(target_account_id).get),
+    )
+    acc_data = acc_doc.to_dict() if acc_doc.exists else {}
 
-    # [NEW] Record last login time
-    db.collection("users").document(uid).set({
-        "lastLoginAt": now,
-        "updatedAt": now
-    }, merge=True)
+    resp = _already_canonical_response(current_user, target_account_id, user_data, acc_data)
+    etag = _canonical_etag(resp.model_dump_json().encode("utf-8"))
+    _cache_set_canonical(uid, token_phone, target_account_id)
+    return resp, etag
 
-    # Fetch account data for response
-    acc_doc = db.collection("accounts").document(target_account_id).get()
-    acc_data = acc_doc.to_dict() if acc_doc.exists else {}
 
+def _already_canonical_response(
+    current_user: CurrentUser, account_id: str, user_data: dict, acc_data: dict
+) -> CanonicalizeResponse:
     return CanonicalizeResponse(
         canonicalized=False,
-        accountId=target_account_id,
+        accountId=account_id,
         firebaseCustomToken=None,
         message="Already using canonical identity.",
         plan=acc_data.get("plan", "free"),
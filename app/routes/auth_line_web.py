@@ -12,6 +12,7 @@ Flow:
 """
 
 import os
+import asyncio
 import logging
 from urllib.parse import urlencode, quote
 
@@ -163,7 +164,9 @@ async def line_web_callback(
     # 3. Create Firebase custom token
     firebase_uid = f"line:{line_user_id}"
     try:
-        custom_token_bytes = fb_auth.create_custom_token(
+        # Signing may be an IAM signBlob RPC; keep it off the event loop
+        custom_token_bytes = await asyncio.to_thread(
+            fb_auth.create_custom_token,
             firebase_uid,
             {"provider": "line", "name": name, "picture": picture},
         )
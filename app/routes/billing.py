@@ -1,15 +1,21 @@
+import asyncio
+import functools
 import logging
 import os
+import re
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
 from google.cloud import firestore
 from pydantic import BaseModel, Field
 
-from app.dependencies import get_current_user, CurrentUser, CurrentUser
+from app.config import is_production_runtime
+from app.dependencies import get_current_user, CurrentUser
 from app.firebase import db
 from app.services.apple import apple_service
 from app.services.app_config import is_feature_enabled, get_maintenance_error_response
@@ -53,6 +59,11 @@ class EntitlementsSyncResponse(BaseModel):
 logger = logging.getLogger("app.billing")
 router = APIRouter(prefix="/billing")
 
+_REVOKED_NOTIFICATION_TYPES = frozenset({"DID_REVOKE", "REFUND"})
+_EXPIRED_NOTIFICATION_TYPES = frozenset({"EXPIRED", "GRACE_PERIOD_EXPIRED"})
+_NOT_ENTITLED_STATUSES = frozenset({"revoked", "expired"})
+_TRUE_FLAGS = frozenset({"1", "true", "yes"})
+
 
 def _normalize_value(value: Any) -> Any:
     if isinstance(value, Enum):
@@ -61,11 +72,14 @@ def _normalize_value(value: Any) -> Any:
 
 
 def _get_field(obj: Any, key: str) -> Optional[Any]:
+    # [PERF] Hot helper (~20 calls per request): exact-type check first, Enum unwrap inlined
     if obj is None:
         return None
-    if isinstance(obj, dict):
-        return _normalize_value(obj.get(key))
-    return _normalize_value(getattr(obj, key, None))
+    if type(obj) is dict or isinstance(obj, dict):
+        value = obj.get(key)
+    else:
+        value = getattr(obj, key, None)
+    return value.value if isinstance(value, Enum) else value
 
 
 def _coerce_int(value: Any) -> Optional[int]:
@@ -77,37 +91,50 @@ def _coerce_int(value: Any) -> Optional[int]:
         return None
 
 
+# [PERF] Expiry/purchase timestamps repeat across a subscriber's renewals and the
+# webhook/confirm pair; datetimes are immutable, so cached instances are safe to share
+@functools.lru_cache(maxsize=4096)
 def _ms_to_datetime(value: Optional[int]) -> Optional[datetime]:
     if value is None:
         return None
     return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
 
 
+# Case-insensitive, single pass over the product id (no lowered copy)
+_BASIC_PLAN_RE = re.compile(r"basic|standard", re.IGNORECASE)
+
+
+# [PERF] The set of SKUs is tiny, so each product id is classified once per process
+@functools.lru_cache(maxsize=256)
 def _plan_for_product_id(product_id: Optional[str]) -> str:
     # [SECURITY FIX] Return "free" instead of "basic" when product_id is missing
     if not product_id:
         return "free"
-    lowered = product_id.lower()
-    if "basic" in lowered or "standard" in lowered:
+    if _BASIC_PLAN_RE.search(product_id):
         return "basic"
     # Default to free for unknown product IDs
     return "free"
 
 
+def _now_ms() -> int:
+    """Current wall-clock time in epoch milliseconds (comparable with Apple's *Date fields)."""
+    return time.time_ns() // 1_000_000
+
+
 def _resolve_status(
-    transaction_info: Any,
-    renewal_info: Any,
     notification_type: Optional[str],
+    revoked_ms: Optional[int],
+    expires_ms: Optional[int],
+    grace_ms: Optional[int],
+    billing_retry: Any,
+    now_ms: Optional[int] = None,
 ) -> str:
-    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-    revoked_ms = _coerce_int(_get_field(transaction_info, "revocationDate"))
-    expires_ms = _coerce_int(_get_field(transaction_info, "expiresDate"))
-    grace_ms = _coerce_int(_get_field(renewal_info, "gracePeriodExpiresDate"))
-    billing_retry = _get_field(renewal_info, "isInBillingRetryPeriod")
-
-    if notification_type in {"DID_REVOKE", "REFUND"}:
+    """Subscription status from already-extracted ms/flag values (no payload re-reads)."""
+    if now_ms is None:
+        now_ms = _now_ms()
+    if notification_type in _REVOKED_NOTIFICATION_TYPES:
         return "revoked"
-    if notification_type in {"EXPIRED", "GRACE_PERIOD_EXPIRED"}:
+    if notification_type in _EXPIRED_NOTIFICATION_TYPES:
         return "expired"
     if revoked_ms:
         return "revoked"
@@ -120,79 +147,185 @@ def _resolve_status(
     return "active"
 
 
-def _is_entitled(status: str, expires_ms: Optional[int]) -> bool:
-    if status in {"revoked", "expired"}:
+def _is_entitled(status: str, expires_ms: Optional[int], now_ms: Optional[int] = None) -> bool:
+    if status in _NOT_ENTITLED_STATUSES:
         return False
-    if expires_ms and expires_ms <= int(datetime.now(timezone.utc).timestamp() * 1000):
+    if now_ms is None:
+        now_ms = _now_ms()
+    if expires_ms and expires_ms <= now_ms:
         return False
     return True
 
 
+# (output key, Apple field) pairs copied verbatim from a decoded transaction
+_TRANSACTION_FIELD_KEYS = (
+    ("bundleId", "bundleId"),
+    ("transactionId", "transactionId"),
+    ("originalTransactionId", "originalTransactionId"),
+    ("productId", "productId"),
+    ("appAccountToken", "appAccountToken"),
+    ("environment", "environment"),
+    ("ownershipType", "inAppOwnershipType"),
+    ("transactionReason", "transactionReason"),
+    ("type", "type"),
+)
+# (output key prefix, Apple epoch-ms field) pairs expanded into <prefix>DateMs / <prefix>At
+_TRANSACTION_DATE_KEYS = (
+    ("purchase", "purchaseDate"),
+    ("expires", "expiresDate"),
+    ("revocation", "revocationDate"),
+)
+
+
+def _field_getter(payload: Any):
+    """Key lookup for a dict or attrs-style payload, dispatched on its type once."""
+    if payload is None:
+        return lambda key: None
+    if type(payload) is dict or isinstance(payload, dict):
+        return payload.get
+    return lambda key: getattr(payload, key, None)
+
+
 def _extract_transaction_fields(transaction_info: Any) -> dict:
-    purchase_ms = _coerce_int(_get_field(transaction_info, "purchaseDate"))
-    expires_ms = _coerce_int(_get_field(transaction_info, "expiresDate"))
-    revoked_ms = _coerce_int(_get_field(transaction_info, "revocationDate"))
+    # [PERF] Dispatch on the payload type once, then walk the key tables
+    get = _field_getter(transaction_info)
+    fields = {out: _normalize_value(get(src)) for out, src in _TRANSACTION_FIELD_KEYS}
+    for prefix, src in _TRANSACTION_DATE_KEYS:
+        ms = _coerce_int(_normalize_value(get(src)))
+        fields[f"{prefix}DateMs"] = ms
+        fields[f"{prefix}At"] = _ms_to_datetime(ms)
+    return fields
 
-    return {
-        "bundleId": _get_field(transaction_info, "bundleId"),
-        "transactionId": _get_field(transaction_info, "transactionId"),
-        "originalTransactionId": _get_field(transaction_info, "originalTransactionId"),
-        "productId": _get_field(transaction_info, "productId"),
-        "appAccountToken": _get_field(transaction_info, "appAccountToken"),
-        "environment": _get_field(transaction_info, "environment"),
-        "ownershipType": _get_field(transaction_info, "inAppOwnershipType"),
-        "transactionReason": _get_field(transaction_info, "transactionReason"),
-        "type": _get_field(transaction_info, "type"),
-        "purchaseDateMs": purchase_ms,
-        "purchaseAt": _ms_to_datetime(purchase_ms),
-        "expiresDateMs": expires_ms,
-        "expiresAt": _ms_to_datetime(expires_ms),
-        "revocationDateMs": revoked_ms,
-        "revocationAt": _ms_to_datetime(revoked_ms),
-    }
+
+_RENEWAL_FIELD_KEYS = ("autoRenewStatus", "expirationIntent", "isInBillingRetryPeriod", "offerType")
 
 
 def _extract_renewal_fields(renewal_info: Any) -> dict:
-    grace_ms = _coerce_int(_get_field(renewal_info, "gracePeriodExpiresDate"))
-    return {
-        "autoRenewStatus": _get_field(renewal_info, "autoRenewStatus"),
-        "expirationIntent": _get_field(renewal_info, "expirationIntent"),
-        "gracePeriodExpiresDateMs": grace_ms,
-        "gracePeriodExpiresAt": _ms_to_datetime(grace_ms),
-        "isInBillingRetryPeriod": _get_field(renewal_info, "isInBillingRetryPeriod"),
-        "offerType": _get_field(renewal_info, "offerType"),
-    }
+    get = _field_getter(renewal_info)
+    fields = {key: _normalize_value(get(key)) for key in _RENEWAL_FIELD_KEYS}
+    grace_ms = _coerce_int(_normalize_value(get("gracePeriodExpiresDate")))
+    fields["gracePeriodExpiresDateMs"] = grace_ms
+    fields["gracePeriodExpiresAt"] = _ms_to_datetime(grace_ms)
+    return fields
+
+
+# [PERF] Pointer doc -> uid, keyed by (collection, doc id) for apple_app_account_tokens/{token}
+# and apple_transactions/{originalTransactionId}. Both are written once per purchase, so the
+# admin SDK's lack of a cache-preferring read is covered by a process-local TTL cache. Misses
+# are cached briefly so webhooks for unmapped purchases don't re-read on every delivery.
+# (uid -> accountId already goes through the shared cache in app.dependencies.)
+_UID_POINTER_CACHE: dict[tuple[str, str], tuple[Optional[str], float]] = {}
+_UID_POINTER_CACHE_TTL = 600  # 10 minutes
+_UID_POINTER_NEGATIVE_TTL = 30
+_UID_POINTER_CACHE_MAX_SIZE = 20000
+# _lookup_uid runs in worker threads; eviction iterates the dict
+_UID_POINTER_CACHE_LOCK = threading.Lock()
+_UID_POINTER_MISS = object()
+
+
+def _uid_pointer_cache_get(collection: str, doc_id: str):
+    """Return the cached uid (None for a cached miss), or _UID_POINTER_MISS."""
+    with _UID_POINTER_CACHE_LOCK:
+        entry = _UID_POINTER_CACHE.get((collection, doc_id))
+        if entry is None:
+            return _UID_POINTER_MISS
+        uid, expire_at = entry
+        if time.monotonic() > expire_at:
+            _UID_POINTER_CACHE.pop((collection, doc_id), None)
+            return _UID_POINTER_MISS
+        return uid
+
+
+def _uid_pointer_cache_set(collection: str, doc_id: str, uid: Optional[str]) -> None:
+    with _UID_POINTER_CACHE_LOCK:
+        if len(_UID_POINTER_CACHE) >= _UID_POINTER_CACHE_MAX_SIZE:
+            now = time.monotonic()
+            for k in [k for k, (_, exp) in _UID_POINTER_CACHE.items() if now > exp]:
+                _UID_POINTER_CACHE.pop(k, None)
+        if len(_UID_POINTER_CACHE) >= _UID_POINTER_CACHE_MAX_SIZE:
+            # Still full: drop the oldest 20%
+            for k in list(_UID_POINTER_CACHE.keys())[:_UID_POINTER_CACHE_MAX_SIZE // 5]:
+                _UID_POINTER_CACHE.pop(k, None)
+        ttl = _UID_POINTER_CACHE_TTL if uid else _UID_POINTER_NEGATIVE_TTL
+        _UID_POINTER_CACHE[(collection, doc_id)] = (uid, time.monotonic() + ttl)
+
+
+def invalidate_uid_pointer_cache(collection: str, doc_id: Optional[str]) -> None:
+    if doc_id:
+        with _UID_POINTER_CACHE_LOCK:
+            _UID_POINTER_CACHE.pop((collection, doc_id), None)
 
 
 def _lookup_uid(app_account_token: Optional[str], original_transaction_id: Optional[str]) -> Optional[str]:
-    uid = None
+    pointers = []
     if app_account_token:
-        token_doc = db.collection("apple_app_account_tokens").document(app_account_token).get()
-        if token_doc.exists:
-            uid = token_doc.to_dict().get("uid")
-    if not uid and original_transaction_id:
-        txn_doc = db.collection("apple_transactions").document(original_transaction_id).get()
-        if txn_doc.exists:
-            uid = txn_doc.to_dict().get("uid")
-    return uid
-
-
-def _runtime_env() -> str:
-    return (
-        os.getenv("APP_ENV")
-        or os.getenv("ENV")
-        or os.getenv("ENVIRONMENT")
-        or "development"
-    )
+        pointers.append(("apple_app_account_tokens", app_account_token))
+    if original_transaction_id:
+        pointers.append(("apple_transactions", original_transaction_id))
+
+    cached = {pointer: _uid_pointer_cache_get(*pointer) for pointer in pointers}
+    for pointer in pointers:
+        # A cached hit ahead of any uncached pointer needs no read at all
+        if cached[pointer] is _UID_POINTER_MISS:
+            break
+        if cached[pointer]:
+            return cached[pointer]
+
+    refs = {
+        pointer: db.collection(pointer[0]).document(pointer[1])
+        for pointer in pointers
+        if cached[pointer] is _UID_POINTER_MISS
+    }
+    snaps = {}
+    if refs:
+        # [PERF] Uncached pointers in one BatchGetDocuments, projected to the only field used
+        snaps = {snap.reference.path: snap for snap in db.get_all(list(refs.values()), field_paths=["uid"])}
+
+    # The token mapping wins when both resolve
+    for pointer in pointers:
+        uid = cached[pointer]
+        if uid is _UID_POINTER_MISS:
+            snap = snaps.get(refs[pointer].path)
+            uid = snap.to_dict().get("uid") if snap is not None and snap.exists else None
+            _uid_pointer_cache_set(*pointer, uid)
+        if uid:
+            return uid
+    return None
+
+
+def _account_id_from_link(link_doc) -> Optional[str]:
+    """accountId from a uid_links snapshot (None when the uid is not linked)."""
+    if not link_doc.exists:
+        return None
+    return link_doc.to_dict().get("accountId")
+
+
+async def _verify_in_thread(verify, signed_payload: Optional[str]):
+    """Run an apple_service verifier in a worker thread; a missing payload yields None."""
+    if not signed_payload:
+        return None
+    return await asyncio.to_thread(verify, signed_payload)
 
 
-def _is_production_runtime() -> bool:
-    return _runtime_env().lower() == "production"
+async def _get_concurrently(*refs):
+    """Fetch independent document refs in parallel threads; None refs yield None."""
+    async def _get(ref):
+        if ref is None:
+            return None
+        return await asyncio.to_thread(ref.get)
+    return await asyncio.gather(*(_get(ref) for ref in refs))
 
 
+@functools.lru_cache(maxsize=1)
 def _debug_verify_enabled() -> bool:
     flag = os.getenv("APPLE_DEBUG_VERIFY_TRANSACTION_INFO", "false")
-    return flag.lower() in {"1", "true", "yes"}
+    return flag.lower() in _TRUE_FLAGS
+
+
+@functools.lru_cache(maxsize=1)
+def _debug_verify_active() -> bool:
+    """Whether confirm cross-checks the JWS against the App Store Server API (never in production)."""
+    return _debug_verify_enabled() and not is_production_runtime()
 
 
 def _jws_meta(signed_payload: str, head_len: int = 24, tail_len: int = 24) -> dict:
@@ -204,25 +337,44 @@ def _jws_meta(signed_payload: str, head_len: int = 24, tail_len: int = 24) -> di
     }
 
 
+_DIFF_FIELDS = (
+    "bundleId",
+    "environment",
+    "productId",
+    "transactionId",
+    "originalTransactionId",
+    "expiresDate",
+    "appAccountToken",
+)
+
+
 def _diff_transaction_info(primary: Any, secondary: Any) -> dict:
-    fields = [
-        "bundleId",
-        "environment",
-        "productId",
-        "transactionId",
-        "originalTransactionId",
-        "expiresDate",
-        "appAccountToken",
-    ]
+    # [PERF] Resolve each side's lookup once instead of a _get_field dispatch per key
+    get_left = _field_getter(primary)
+    get_right = _field_getter(secondary)
     diff = {}
-    for field in fields:
-        left = _get_field(primary, field)
-        right = _get_field(secondary, field)
+    for field in _DIFF_FIELDS:
+        left = _normalize_value(get_left(field))
+        right = _normalize_value(get_right(field))
         if left != right:
             diff[field] = {"app": left, "server": right}
     return diff
 
 
+def _log_transaction_info_diff(transaction_info: Any, transaction_id: str, log_context: dict) -> None:
+    """Debug cross-check of a confirmed JWS against the App Store Server API."""
+    server_info = apple_service.get_transaction_info(transaction_id)
+    if not server_info:
+        logger.warning("billing.ios.confirm.transaction_info_unavailable %s", log_context)
+        return
+    diff = _diff_transaction_info(transaction_info, server_info)
+    if diff:
+        logger.warning(
+            "billing.ios.confirm.transaction_info_mismatch %s",
+            {**log_context, "diff": diff},
+        )
+
+
 # =============================================================================
 # POST /billing/ios/entitlements/sync - Sync entitlements from iOS app
 # =============================================================================
@@ -270,7 +422,7 @@ async def sync_ios_entitlements(
         )
 
     # Get account ID
-    link_doc = db.collection("uid_links").document(current_user.uid).get()
+    link_doc = await asyncio.to_thread(db.collection("uid_links").document(current_user.uid).get)
     account_id = link_doc.to_dict().get("accountId") if link_doc.exists else None
 
     # Generate appAccountToken from account_id (UUID format required by Apple)
@@ -288,141 +440,173 @@ async def sync_ios_entitlements(
     best_expires_at = None
     is_entitled = False
 
-    for item in req.items:
-        original_transaction_id = item.original_transaction_id
-        product_id = item.product_id
-
-        logger.info(
-            "entitlements_sync_item",
-            extra={
-                "uid": current_user.uid,
-                "accountId": account_id,
-                "originalTransactionId": original_transaction_id,
-                "productId": product_id,
-            }
-        )
+    # [PERF] Writes for every item are queued on one WriteBatch instead of a commit RPC each.
+    # Whatever is queued is committed on the way out even if an Apple call fails partway,
+    # so mappings for the items already processed are kept.
+    batch = db.batch()
+    batch_count = 0
+    queued_transaction_ids = []
+
+    async def _commit_queued():
+        nonlocal batch, batch_count
+        if batch_count == 0:
+            return
+        await asyncio.to_thread(batch.commit)
+        batch = db.batch()
+        batch_count = 0
+        # Pointers go into the cache only once their mapping is actually written
+        for queued_id in queued_transaction_ids:
+            _uid_pointer_cache_set("apple_transactions", queued_id, current_user.uid)
+        queued_transaction_ids.clear()
 
-        # 1. Store user_id <-> original_transaction_id mapping
-        db.collection("apple_transactions").document(original_transaction_id).set({
-            "uid": current_user.uid,
-            "accountId": account_id,
-            "productId": product_id,
-            "source": "entitlements_sync",
-            "lastSyncAt": firestore.SERVER_TIMESTAMP,
-        }, merge=True)
-
-        # 2. Call Apple API to get authoritative subscription status
-        apple_status = apple_service.get_subscription_status_for_account(
-            original_transaction_id,
-            expected_app_account_token=app_account_token
-        )
+    try:
+        for item in req.items:
+            original_transaction_id = item.original_transaction_id
+            product_id = item.product_id
 
-        if not apple_status.get("found"):
-            logger.warning(
-                "entitlements_sync_not_found_in_apple",
+            logger.info(
+                "entitlements_sync_item",
                 extra={
-                    "originalTransactionId": original_transaction_id,
                     "uid": current_user.uid,
+                    "accountId": account_id,
+                    "originalTransactionId": original_transaction_id,
+                    "productId": product_id,
                 }
             )
-            synced_details.append({
-                "originalTransactionId": original_transaction_id,
-                "status": "not_found",
-                "error": "Subscription not found in Apple API",
-            })
-            continue
-
-        status = apple_status.get("status", "unknown")
-        active = apple_status.get("active", False)
-        expires_date = apple_status.get("expires_date")
-        actual_product_id = apple_status.get("product_id") or product_id
-        existing_token = apple_status.get("app_account_token")
 
-        # Determine plan from product_id
-        plan = _plan_for_product_id(actual_product_id)
-        if not active:
-            plan = "free"
-
-        # 3. Set appAccountToken if not already set (links subscription to our user)
-        if app_account_token and not existing_token:
-            token_set = apple_service.set_app_account_token(
+            # 1. Store user_id <-> original_transaction_id mapping
+            batch.set(db.collection("apple_transactions").document(original_transaction_id), {
+                "uid": current_user.uid,
+                "accountId": account_id,
+                "productId": product_id,
+                "source": "entitlements_sync",
+                "lastSyncAt": firestore.SERVER_TIMESTAMP,
+            }, merge=True)
+            batch_count += 1
+            queued_transaction_ids.append(original_transaction_id)
+
+            # 2. Call Apple API to get authoritative subscription status
+            apple_status = await asyncio.to_thread(
+                apple_service.get_subscription_status_for_account,
                 original_transaction_id,
-                app_account_token
+                expected_app_account_token=app_account_token,
             )
-            if token_set:
-                logger.info(
-                    "entitlements_sync_token_set",
-                    extra={
-                        "originalTransactionId": original_transaction_id,
-                        "appAccountToken": app_account_token,
-                    }
-                )
-
-        # 4. Update entitlements collection
-        entitlement_id = f"apple:{original_transaction_id}"
-        entitlement_ref = db.collection("entitlements").document(entitlement_id)
-        existing_entitlement = entitlement_ref.get()
-
-        entitlement_data = {
-            "status": status,
-            "plan": plan,
-            "productId": actual_product_id,
-            "currentPeriodEnd": _ms_to_datetime(expires_date) if expires_date else None,
-            "provider": "apple",
-            "providerEntitlementId": original_transaction_id,
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-            "updatedBy": "entitlements_sync",
-        }
 
-        if not existing_entitlement.exists:
-            entitlement_data["ownerAccountId"] = account_id
-            entitlement_data["ownerUserId"] = current_user.uid
-            entitlement_data["createdAt"] = firestore.SERVER_TIMESTAMP
-        else:
-            # Verify ownership
-            existing_owner = existing_entitlement.to_dict().get("ownerAccountId")
-            if existing_owner and existing_owner != account_id:
+            if not apple_status.get("found"):
                 logger.warning(
-                    "entitlements_sync_ownership_conflict",
+                    "entitlements_sync_not_found_in_apple",
                     extra={
-                        "entitlementId": entitlement_id,
-                        "existingOwner": existing_owner,
-                        "requestingAccount": account_id,
+                        "originalTransactionId": original_transaction_id,
+                        "uid": current_user.uid,
                     }
                 )
                 synced_details.append({
                     "originalTransactionId": original_transaction_id,
-                    "status": "ownership_conflict",
-                    "error": "Subscription owned by another account",
+                    "status": "not_found",
+                    "error": "Subscription not found in Apple API",
                 })
                 continue
 
-        entitlement_ref.set(entitlement_data, merge=True)
+            status = apple_status.get("status", "unknown")
+            active = apple_status.get("active", False)
+            expires_date = apple_status.get("expires_date")
+            actual_product_id = apple_status.get("product_id") or product_id
+            existing_token = apple_status.get("app_account_token")
+
+            # Determine plan from product_id
+            plan = _plan_for_product_id(actual_product_id)
+            if not active:
+                plan = "free"
+
+            # 3. Set appAccountToken if not already set (links subscription to our user)
+            if app_account_token and not existing_token:
+                token_set = await asyncio.to_thread(
+                    apple_service.set_app_account_token,
+                    original_transaction_id,
+                    app_account_token,
+                )
+                if token_set:
+                    logger.info(
+                        "entitlements_sync_token_set",
+                        extra={
+                            "originalTransactionId": original_transaction_id,
+                            "appAccountToken": app_account_token,
+                        }
+                    )
 
-        # 5. Update account plan if this is the best entitlement
-        if active and plan != "free":
-            is_entitled = True
-            if plan == "basic":  # or compare priority
-                best_plan = plan
-                best_expires_at = expires_date
+            # 4. Update entitlements collection
+            entitlement_id = f"apple:{original_transaction_id}"
+            entitlement_ref = db.collection("entitlements").document(entitlement_id)
+            existing_entitlement = await asyncio.to_thread(entitlement_ref.get)
+
+            entitlement_data = {
+                "status": status,
+                "plan": plan,
+                "productId": actual_product_id,
+                "currentPeriodEnd": _ms_to_datetime(expires_date) if expires_date else None,
+                "provider": "apple",
+                "providerEntitlementId": original_transaction_id,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+                "updatedBy": "entitlements_sync",
+            }
 
-        synced_details.append({
-            "originalTransactionId": original_transaction_id,
-            "status": status,
-            "plan": plan,
-            "active": active,
-            "expiresAt": expires_date,
-        })
+            if not existing_entitlement.exists:
+                entitlement_data["ownerAccountId"] = account_id
+                entitlement_data["ownerUserId"] = current_user.uid
+                entitlement_data["createdAt"] = firestore.SERVER_TIMESTAMP
+            else:
+                # Verify ownership
+                existing_owner = existing_entitlement.to_dict().get("ownerAccountId")
+                if existing_owner and existing_owner != account_id:
+                    logger.warning(
+                        "entitlements_sync_ownership_conflict",
+                        extra={
+                            "entitlementId": entitlement_id,
+                            "existingOwner": existing_owner,
+                            "requestingAccount": account_id,
+                        }
+                    )
+                    synced_details.append({
+                        "originalTransactionId": original_transaction_id,
+                        "status": "ownership_conflict",
+                        "error": "Subscription owned by another account",
+                    })
+                    continue
 
-    # 6. Update account with best plan
-    if account_id and is_entitled:
-        db.collection("accounts").document(account_id).set({
-            "plan": best_plan,
-            "planExpiresAt": _ms_to_datetime(best_expires_at) if best_expires_at else None,
-            "planUpdatedAt": firestore.SERVER_TIMESTAMP,
-        }, merge=True)
+            batch.set(entitlement_ref, entitlement_data, merge=True)
+            batch_count += 1
+            if batch_count >= 400:
+                await _commit_queued()
+
+            # 5. Update account plan if this is the best entitlement
+            if active and plan != "free":
+                is_entitled = True
+                if plan == "basic":  # or compare priority
+                    best_plan = plan
+                    best_expires_at = expires_date
 
-        db.collection("users").document(current_user.uid).update({
+            synced_details.append({
+                "originalTransactionId": original_transaction_id,
+                "status": status,
+                "plan": plan,
+                "active": active,
+                "expiresAt": expires_date,
+            })
+
+        # 6. Update account with best plan
+        if account_id and is_entitled:
+            batch.set(db.collection("accounts").document(account_id), {
+                "plan": best_plan,
+                "planExpiresAt": _ms_to_datetime(best_expires_at) if best_expires_at else None,
+                "planUpdatedAt": firestore.SERVER_TIMESTAMP,
+            }, merge=True)
+            batch_count += 1
+    finally:
+        await _commit_queued()
+
+    # update() fails on a missing users doc, so it stays out of the batch
+    if account_id and is_entitled:
+        await asyncio.to_thread(db.collection("users").document(current_user.uid).update, {
             "plan": best_plan,
             "planUpdatedAt": firestore.SERVER_TIMESTAMP,
         })
@@ -453,6 +637,7 @@ async def confirm_ios_purchase(
     req: BillingConfirmRequest,
     current_user: CurrentUser = Depends(get_current_user),
     response: Response = None,
+    background_tasks: BackgroundTasks = None,
 ):
     request_id = str(uuid.uuid4())
     if response is not None:
@@ -480,7 +665,9 @@ async def confirm_ios_purchase(
     log_context.update(_jws_meta(req.signedTransaction))
     logger.info("billing.ios.confirm.request %s", log_context)
 
-    transaction_info, verify_error = apple_service.verify_jws_detailed(req.signedTransaction)
+    # [PERF] Signature/chain checks are CPU work (plus OCSP I/O when online checks are on);
+    # keep them off the event loop
+    transaction_info, verify_error = await asyncio.to_thread(apple_service.verify_jws_detailed, req.signedTransaction)
     if not transaction_info:
         logger.warning(
             "billing.ios.confirm.verify_failed %s",
@@ -516,26 +703,19 @@ async def confirm_ios_purchase(
         },
     )
 
-    if _debug_verify_enabled() and not _is_production_runtime():
+    if _debug_verify_active():
         transaction_id = fields.get("transactionId")
         if transaction_id:
-            server_info = apple_service.get_transaction_info(transaction_id)
-            if server_info:
-                diff = _diff_transaction_info(transaction_info, server_info)
-                if diff:
-                    logger.warning(
-                        "billing.ios.confirm.transaction_info_mismatch %s",
-                        {**log_context, "diff": diff},
-                    )
+            # [PERF] The debug-only App Store round trip runs after the response is sent
+            if background_tasks is not None:
+                background_tasks.add_task(_log_transaction_info_diff, transaction_info, transaction_id, log_context)
             else:
-                logger.warning(
-                    "billing.ios.confirm.transaction_info_unavailable %s",
-                    log_context,
-                )
+                await asyncio.to_thread(_log_transaction_info_diff, transaction_info, transaction_id, log_context)
 
-    status = _resolve_status(transaction_info, None, None)
+    now_ms = _now_ms()
+    status = _resolve_status(None, fields.get("revocationDateMs"), fields.get("expiresDateMs"), None, None, now_ms)
     plan = _plan_for_product_id(product_id)
-    entitled = _is_entitled(status, fields.get("expiresDateMs"))
+    entitled = _is_entitled(status, fields.get("expiresDateMs"), now_ms)
     if not entitled:
         plan = "free"
 
@@ -565,144 +745,186 @@ async def confirm_ios_purchase(
             }
         )
 
-    subscription_data = {
-        **fields,
+    # [PERF] fields is built for this request only; extend it in place instead of copying it.
+    # The same payload goes to apple_transactions and users/{uid}/subscriptions/apple (the
+    # webhook already writes uid/lastEventAt to the subscription doc too).
+    subscription_data = fields
+    subscription_data.update({
         "status": status,
         "plan": plan,
         "entitled": entitled,
+        "uid": current_user.uid,
         "source": "app_confirm",
         "updatedAt": firestore.SERVER_TIMESTAMP,
-    }
+        "lastEventAt": firestore.SERVER_TIMESTAMP,
+    })
 
+    # Reads and ownership checks first, so a rejected confirm leaves nothing half-written
+    token_ref = None
     if app_account_token:
         token_ref = db.collection("apple_app_account_tokens").document(app_account_token)
-        existing_token = token_ref.get()
-        if existing_token.exists:
-            mapped_uid = existing_token.to_dict().get("uid")
-            if mapped_uid and mapped_uid != current_user.uid:
-                raise HTTPException(status_code=409, detail="appAccountToken already linked")
-        token_ref.set({
-            "uid": current_user.uid,
-            "originalTransactionId": original_transaction_id,
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-            "createdAt": firestore.SERVER_TIMESTAMP,
-        }, merge=True)
-
-    if original_transaction_id:
-        db.collection("apple_transactions").document(original_transaction_id).set({
-            **subscription_data,
-            "uid": current_user.uid,
-            "lastEventAt": firestore.SERVER_TIMESTAMP,
-        }, merge=True)
-
-    db.collection("users").document(current_user.uid).collection("subscriptions").document("apple").set(
-        subscription_data, merge=True
-    )
 
     # [FIX] Create entitlement ID for linking
     entitlement_id = f"apple:{original_transaction_id}" if original_transaction_id else None
+    entitlement_ref = None
+    if original_transaction_id and entitlement_id:
+        entitlement_ref = db.collection("entitlements").document(entitlement_id)
+
+    # [Unified Account] Resolve the account the plan is synced to. Always from uid_links:
+    # the token's accountId claim (and get_current_user's cache of it) can be stale.
+    link_ref = db.collection("uid_links").document(current_user.uid)
+    user_ref = db.collection("users").document(current_user.uid)
+
+    # [PERF] The reads and the writes (bar users/{uid}) share one transaction: the ownership checks are
+    # pinned to the commit, so a concurrent confirm can't claim the token or entitlement in between
+    @firestore.transactional
+    def txn_confirm(tx):
+        # [PERF] One BatchGetDocuments for every doc the confirm needs, masked to the
+        # fields it reads (token uid, link accountId, entitlement owner)
+        refs = [ref for ref in (token_ref, link_ref, entitlement_ref) if ref is not None]
+        snaps = {
+            snap.reference.path: snap
+            for snap in db.get_all(refs, field_paths=["uid", "accountId", "ownerAccountId"], transaction=tx)
+        }
+
+        resolved_account_id = _account_id_from_link(snaps[link_ref.path])
+
+        if token_ref is not None:
+            existing_token = snaps[token_ref.path]
+            if existing_token.exists:
+                mapped_uid = existing_token.to_dict().get("uid")
+                if mapped_uid and mapped_uid != current_user.uid:
+                    raise HTTPException(status_code=409, detail="appAccountToken already linked")
+
+        # [FIX] Create entitlements document (CRITICAL - /users/me checks this!)
+        entitlement_data = None
+        entitlement_created = False
+        if entitlement_ref is not None:
+            existing_entitlement = snaps[entitlement_ref.path]
+            entitlement_data = {
+                "status": status,
+                "plan": plan,
+                "productId": product_id,
+                "currentPeriodEnd": fields.get("expiresAt"),
+                "environment": fields.get("environment"),
+                "provider": "apple",
+                "providerEntitlementId": original_transaction_id,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+                "updatedBy": "app_confirm",
+            }
+
+            if not existing_entitlement.exists:
+                # New entitlement - set owner
+                entitlement_data["ownerAccountId"] = resolved_account_id
+                entitlement_data["ownerUserId"] = current_user.uid
+                entitlement_data["createdAt"] = firestore.SERVER_TIMESTAMP
+                entitlement_created = True
+            else:
+                # Existing entitlement - verify ownership
+                existing_data = existing_entitlement.to_dict()
+                existing_owner = existing_data.get("ownerAccountId")
+                if existing_owner and existing_owner != resolved_account_id:
+                    logger.warning(
+                        "entitlement_ownership_conflict",
+                        extra={
+                            "entitlementId": entitlement_id,
+                            "existingOwner": existing_owner,
+                            "requestingAccount": resolved_account_id,
+                            "requestingUid": current_user.uid,
+                        }
+                    )
+                    # [FIX] Return 409 Conflict instead of silently accepting
+                    # This prevents one account from claiming another's subscription
+                    raise HTTPException(
+                        status_code=409,
+                        detail={
+                            "error": "entitlement_owned_by_another_account",
+                            "message": "This subscription is already linked to a different account",
+                            "ownerAccountId": existing_owner,
+                        }
+                    )
+
+        if token_ref is not None:
+            tx.set(token_ref, {
+                "uid": current_user.uid,
+                "originalTransactionId": original_transaction_id,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+                "createdAt": firestore.SERVER_TIMESTAMP,
+            }, merge=True)
+
+        if original_transaction_id:
+            tx.set(
+                db.collection("apple_transactions").document(original_transaction_id),
+                subscription_data, merge=True
+            )
+
+        tx.set(
+            user_ref.collection("subscriptions").document("apple"),
+            subscription_data, merge=True
+        )
+
+        # [Unified Account] Sync Plan to Account (Production only)
+        if resolved_account_id and is_production:
+            # We should store expiresAt on the account for JIT checks
+            tx.set(db.collection("accounts").document(resolved_account_id), {
+                "plan": plan,
+                "planExpiresAt": fields.get("expiresAt"),
+                "planUpdatedAt": firestore.SERVER_TIMESTAMP,
+                "lastTransactionId": fields.get("transactionId"),
+                "originalTransactionId": original_transaction_id,
+                "appleEntitlementId": entitlement_id,
+            }, merge=True)
+
+        if entitlement_ref is not None:
+            tx.set(entitlement_ref, entitlement_data, merge=True)
+
+        return entitlement_created, resolved_account_id
+
+    # [PERF] Sync client: keep the transaction's RPCs off the event loop
+    entitlement_created, account_id = await asyncio.to_thread(txn_confirm, db.transaction())
 
     # [FIX] Only update user/account plan for Production transactions
-    # Sandbox transactions are recorded in entitlements but don't affect plan
+    # Sandbox transactions are recorded in entitlements but don't affect plan.
+    # update() fails on a missing users doc, so it stays out of the transaction
+    # rather than taking the token/entitlement writes down with it.
     if is_production:
-        db.collection("users").document(current_user.uid).update({
+        await asyncio.to_thread(user_ref.update, {
             "plan": plan,
             "subscriptionPlatform": "ios",
             "planUpdatedAt": firestore.SERVER_TIMESTAMP,
             "appleEntitlementId": entitlement_id,
         })
+    sync_account = bool(account_id and is_production)
+    if app_account_token:
+        _uid_pointer_cache_set("apple_app_account_tokens", app_account_token, current_user.uid)
+    if original_transaction_id:
+        _uid_pointer_cache_set("apple_transactions", original_transaction_id, current_user.uid)
 
-    # [Unified Account] Sync Plan to Account (Production only)
-    link_ref = db.collection("uid_links").document(current_user.uid)
-    link_doc = link_ref.get()
-    account_id = None
-    if link_doc.exists:
-        account_id = link_doc.to_dict().get("accountId")
-        if account_id and is_production:
-             # We should store expiresAt on the account for JIT checks
-             update_data = {
-                 "plan": plan,
-                 "planExpiresAt": _ms_to_datetime(fields.get("expiresDateMs")),
-                 "planUpdatedAt": firestore.SERVER_TIMESTAMP,
-                 "lastTransactionId": fields.get("transactionId"),
-                 "originalTransactionId": original_transaction_id,
-                 "appleEntitlementId": entitlement_id,
-             }
-
-             db.collection("accounts").document(account_id).set(update_data, merge=True)
-
-             # Log transition
-             logger.info(
-                 "subscription_state_transition",
-                 extra={
-                     "uid": current_user.uid,
-                     "accountId": account_id,
-                     "fromPlan": "unknown",
-                     "toPlan": plan,
-                     "reason": "purchase_confirm",
-                     "transactionId": fields.get("transactionId"),
-                     "originalTransactionId": original_transaction_id,
-                     "expiresAt": fields.get("expiresDateMs")
-                 }
-             )
-
-    # [FIX] Create entitlements document (CRITICAL - /users/me checks this!)
-    if original_transaction_id and entitlement_id:
-        entitlement_ref = db.collection("entitlements").document(entitlement_id)
-        existing_entitlement = entitlement_ref.get()
-
-        entitlement_data = {
-            "status": status,
-            "plan": plan,
-            "productId": product_id,
-            "currentPeriodEnd": _ms_to_datetime(fields.get("expiresDateMs")),
-            "environment": fields.get("environment"),
-            "provider": "apple",
-            "providerEntitlementId": original_transaction_id,
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-            "updatedBy": "app_confirm",
-        }
-
-        if not existing_entitlement.exists:
-            # New entitlement - set owner
-            entitlement_data["ownerAccountId"] = account_id
-            entitlement_data["ownerUserId"] = current_user.uid
-            entitlement_data["createdAt"] = firestore.SERVER_TIMESTAMP
-            logger.info(
-                "entitlement_created",
-                extra={
-                    "entitlementId": entitlement_id,
-                    "ownerAccountId": account_id,
-                    "ownerUserId": current_user.uid,
-                    "plan": plan,
-                }
-            )
-        else:
-            # Existing entitlement - verify ownership
-            existing_data = existing_entitlement.to_dict()
-            existing_owner = existing_data.get("ownerAccountId")
-            if existing_owner and existing_owner != account_id:
-                logger.warning(
-                    "entitlement_ownership_conflict",
-                    extra={
-                        "entitlementId": entitlement_id,
-                        "existingOwner": existing_owner,
-                        "requestingAccount": account_id,
-                        "requestingUid": current_user.uid,
-                    }
-                )
-                # [FIX] Return 409 Conflict instead of silently accepting
-                # This prevents one account from claiming another's subscription
-                raise HTTPException(
-                    status_code=409,
-                    detail={
-                        "error": "entitlement_owned_by_another_account",
-                        "message": "This subscription is already linked to a different account",
-                        "ownerAccountId": existing_owner,
-                    }
-                )
-
-        entitlement_ref.set(entitlement_data, merge=True)
+    if sync_account:
+        # Log transition
+        logger.info(
+            "subscription_state_transition",
+            extra={
+                "uid": current_user.uid,
+                "accountId": account_id,
+                "fromPlan": "unknown",
+                "toPlan": plan,
+                "reason": "purchase_confirm",
+                "transactionId": fields.get("transactionId"),
+                "originalTransactionId": original_transaction_id,
+                "expiresAt": fields.get("expiresDateMs")
+            }
+        )
+    if entitlement_created:
+        logger.info(
+            "entitlement_created",
+            extra={
+                "entitlementId": entitlement_id,
+                "ownerAccountId": account_id,
+                "ownerUserId": current_user.uid,
+                "plan": plan,
+            }
+        )
 
     return BillingConfirmResponse(
         ok=True,
@@ -742,16 +964,19 @@ async def reconcile_apple_subscriptions():
             .where("provider", "==", "apple")\
             .where("status", "in", active_statuses)
 
-        entitlements = list(entitlements_query.stream())
+        # [PERF] Materialize each snapshot's dict once; the loop below reuses it
+        docs = await asyncio.to_thread(lambda: list(entitlements_query.stream()))
+        entitlements = [(doc.id, doc.to_dict()) for doc in docs]
     except Exception as e:
         # Firestore may require a composite index for this query
         # Fallback: query without status filter
         logger.warning(f"Composite index may be missing, falling back: {e}")
         entitlements_query = db.collection("entitlements").where("provider", "==", "apple")
-        entitlements = [
-            doc for doc in entitlements_query.stream()
-            if doc.to_dict().get("status") in active_statuses
-        ]
+        entitlements = []
+        for doc in await asyncio.to_thread(lambda: list(entitlements_query.stream())):
+            data = doc.to_dict()
+            if data.get("status") in active_statuses:
+                entitlements.append((doc.id, data))
 
     results = {
         "checked": 0,
@@ -763,9 +988,7 @@ async def reconcile_apple_subscriptions():
         "details": []
     }
 
-    for entitlement_doc in entitlements:
-        entitlement_id = entitlement_doc.id
-        entitlement_data = entitlement_doc.to_dict()
+    for entitlement_id, entitlement_data in entitlements:
         original_transaction_id = entitlement_data.get("providerEntitlementId")
         owner_account_id = entitlement_data.get("ownerAccountId")
         current_status = entitlement_data.get("status")
@@ -777,7 +1000,9 @@ async def reconcile_apple_subscriptions():
 
         try:
             # 2. Call Apple API
-            apple_status = apple_service.get_subscription_status_for_account(original_transaction_id)
+            apple_status = await asyncio.to_thread(
+                apple_service.get_subscription_status_for_account, original_transaction_id
+            )
 
             if not apple_status.get("found"):
                 logger.warning(
@@ -809,10 +1034,11 @@ async def reconcile_apple_subscriptions():
 
                 # Update entitlement
                 expires_date = apple_status.get("expires_date")
-                db.collection("entitlements").document(entitlement_id).update({
+                expires_at = _ms_to_datetime(expires_date) if expires_date else None
+                await asyncio.to_thread(db.collection("entitlements").document(entitlement_id).update, {
                     "status": new_status,
                     "plan": new_plan,
-                    "currentPeriodEnd": _ms_to_datetime(expires_date) if expires_date else None,
+                    "currentPeriodEnd": expires_at,
                     "updatedAt": firestore.SERVER_TIMESTAMP,
                     "updatedBy": "reconciliation",
                     "lastReconciliationAt": firestore.SERVER_TIMESTAMP,
@@ -820,9 +1046,9 @@ async def reconcile_apple_subscriptions():
 
                 # Update account plan if needed
                 if owner_account_id:
-                    db.collection("accounts").document(owner_account_id).update({
+                    await asyncio.to_thread(db.collection("accounts").document(owner_account_id).update, {
                         "plan": new_plan,
-                        "planExpiresAt": _ms_to_datetime(expires_date) if expires_date else None,
+                        "planExpiresAt": expires_at,
                         "planUpdatedAt": firestore.SERVER_TIMESTAMP,
                     })
 
@@ -840,7 +1066,7 @@ async def reconcile_apple_subscriptions():
                 })
             else:
                 # Update lastReconciliationAt even if unchanged
-                db.collection("entitlements").document(entitlement_id).update({
+                await asyncio.to_thread(db.collection("entitlements").document(entitlement_id).update, {
                     "lastReconciliationAt": firestore.SERVER_TIMESTAMP,
                 })
                 results["unchanged"] += 1
@@ -874,7 +1100,8 @@ async def handle_app_store_notifications(req: AppStoreNotificationRequest):
     if not apple_service.verifier:
         raise HTTPException(status_code=503, detail="App Store verification not configured")
 
-    decoded_notification = apple_service.verify_notification(req.signedPayload)
+    # [PERF] Signature/chain checks run in a worker thread, not on the event loop
+    decoded_notification = await asyncio.to_thread(apple_service.verify_notification, req.signedPayload)
     if not decoded_notification:
         raise HTTPException(status_code=400, detail="invalid signedPayload")
 
@@ -895,13 +1122,11 @@ async def handle_app_store_notifications(req: AppStoreNotificationRequest):
         signed_transaction_info = _get_field(data, "signedTransactionInfo")
         signed_renewal_info = _get_field(data, "signedRenewalInfo")
 
-        transaction_info = None
-        if signed_transaction_info:
-            transaction_info = apple_service.verify_jws(signed_transaction_info)
-
-        renewal_info = None
-        if signed_renewal_info:
-            renewal_info = apple_service.verify_renewal_info(signed_renewal_info)
+        # [PERF] The two JWS are independent; verify them in parallel threads
+        transaction_info, renewal_info = await asyncio.gather(
+            _verify_in_thread(apple_service.verify_jws, signed_transaction_info),
+            _verify_in_thread(apple_service.verify_renewal_info, signed_renewal_info),
+        )
 
         if not transaction_info:
             raise HTTPException(status_code=400, detail="missing signedTransactionInfo")
@@ -910,34 +1135,57 @@ async def handle_app_store_notifications(req: AppStoreNotificationRequest):
         original_transaction_id = fields.get("originalTransactionId")
         app_account_token = fields.get("appAccountToken")
         product_id = fields.get("productId")
-
-        status = _resolve_status(transaction_info, renewal_info, notification_type)
+        entitlement_id = f"apple:{original_transaction_id}" if original_transaction_id else None
+
+        now_ms = _now_ms()
+        renewal_fields = _extract_renewal_fields(renewal_info) if renewal_info else None
+        status = _resolve_status(
+            notification_type,
+            fields.get("revocationDateMs"),
+            fields.get("expiresDateMs"),
+            renewal_fields["gracePeriodExpiresDateMs"] if renewal_fields else None,
+            renewal_fields["isInBillingRetryPeriod"] if renewal_fields else None,
+            now_ms,
+        )
         plan = _plan_for_product_id(product_id)
-        if not _is_entitled(status, fields.get("expiresDateMs")):
+        if not _is_entitled(status, fields.get("expiresDateMs"), now_ms):
             plan = "free"
 
-        uid = _lookup_uid(app_account_token, original_transaction_id)
+        uid = await asyncio.to_thread(_lookup_uid, app_account_token, original_transaction_id)
 
-        summary_data = {
-            **fields,
+        # [PERF] fields is built for this request only; extend it in place instead of copying it.
+        # The same payload goes to apple_transactions and the user's subscription doc.
+        summary_data = fields
+        summary_data.update({
             "status": status,
             "plan": plan,
             "uid": uid,
             "lastNotificationType": notification_type,
             "lastNotificationSubtype": subtype,
             "lastNotificationUUID": notification_uuid,
+            "source": "app_store_notification",
+            "updatedAt": firestore.SERVER_TIMESTAMP,
             "lastEventAt": firestore.SERVER_TIMESTAMP,
-        }
+        })
+
+        if renewal_fields:
+            summary_data["renewalInfo"] = renewal_fields
 
-        if renewal_info:
-            summary_data["renewalInfo"] = _extract_renewal_fields(renewal_info)
+        # [PERF] Every write below except the users/{uid} plan goes out in one atomic WriteBatch
+        # (single commit RPC)
+        batch = db.batch()
+        sync_account = False
+        user_plan_update = None
 
         if original_transaction_id:
-            db.collection("apple_transactions").document(original_transaction_id).set(
+            batch.set(
+                db.collection("apple_transactions").document(original_transaction_id),
                 summary_data, merge=True
             )
 
         if uid:
+            user_ref = db.collection("users").document(uid)
+
             # [FIX] Only Production transactions should update account.plan
             webhook_env = fields.get("environment", "Production")
             is_production_webhook = webhook_env == "Production"
@@ -956,74 +1204,58 @@ async def handle_app_store_notifications(req: AppStoreNotificationRequest):
 
             # [Unified Account] Sync to Account (Production only)
             link_ref = db.collection("uid_links").document(uid)
-            link_doc = link_ref.get()
-            account_id = None
-            if link_doc.exists:
-                account_id = link_doc.to_dict().get("accountId")
-                if account_id and is_production_webhook:
-                    db.collection("accounts").document(account_id).set({
-                        "plan": plan,
-                        "planExpiresAt": _ms_to_datetime(fields.get("expiresDateMs")),
-                        "planUpdatedAt": firestore.SERVER_TIMESTAMP,
-                        "lastTransactionId": fields.get("transactionId"),
-                        "originalTransactionId": original_transaction_id,
-                        "appleEntitlementId": f"apple:{original_transaction_id}" if original_transaction_id else None,
-                    }, merge=True)
-
-                    logger.info(
-                         "subscription_state_transition",
-                         extra={
-                             "uid": uid,
-                             "accountId": account_id,
-                             "toPlan": plan,
-                             "reason": f"notification_{notification_type}",
-                             "transactionId": fields.get("transactionId"),
-                             "expiresAt": fields.get("expiresDateMs")
-                         }
-                     )
+            entitlement_ref = None
+            if entitlement_id:
+                entitlement_ref = db.collection("entitlements").document(entitlement_id)
+            # [PERF] uid_links and the entitlement are independent reads
+            link_doc, existing_entitlement = await _get_concurrently(link_ref, entitlement_ref)
+            account_id = _account_id_from_link(link_doc)
+            if account_id and is_production_webhook:
+                sync_account = True
+                batch.set(db.collection("accounts").document(account_id), {
+                    "plan": plan,
+                    "planExpiresAt": fields.get("expiresAt"),
+                    "planUpdatedAt": firestore.SERVER_TIMESTAMP,
+                    "lastTransactionId": fields.get("transactionId"),
+                    "originalTransactionId": original_transaction_id,
+                    "appleEntitlementId": entitlement_id,
+                }, merge=True)
 
             # Update entitlements collection (record both Production and Sandbox for auditing)
-            if original_transaction_id:
-                entitlement_id = f"apple:{original_transaction_id}"
-                entitlement_ref = db.collection("entitlements").document(entitlement_id)
+            if entitlement_ref is not None:
                 entitlement_update = {
                     "status": status,
                     "plan": plan,
                     "productId": product_id,
-                    "currentPeriodEnd": _ms_to_datetime(fields.get("expiresDateMs")),
+                    "currentPeriodEnd": fields.get("expiresAt"),
                     "environment": webhook_env,
                     "lastNotificationType": notification_type,
                     "updatedAt": firestore.SERVER_TIMESTAMP,
                     "updatedBy": "webhook",
                 }
                 # Only set ownerAccountId/ownerUserId if not already set (don't overwrite)
-                existing_entitlement = entitlement_ref.get()
                 if not existing_entitlement.exists:
                     entitlement_update["provider"] = "apple"
                     entitlement_update["providerEntitlementId"] = original_transaction_id
                     entitlement_update["ownerAccountId"] = account_id
                     entitlement_update["ownerUserId"] = uid
                     entitlement_update["createdAt"] = firestore.SERVER_TIMESTAMP
-                entitlement_ref.set(entitlement_update, merge=True)
+                batch.set(entitlement_ref, entitlement_update, merge=True)
 
             # Update user subscription record (always, for history)
-            db.collection("users").document(uid).collection("subscriptions").document("apple").set(
-                {
-                    **summary_data,
-                    "source": "app_store_notification",
-                    "updatedAt": firestore.SERVER_TIMESTAMP,
-                },
-                merge=True,
+            batch.set(
+                user_ref.collection("subscriptions").document("apple"),
+                summary_data, merge=True
             )
 
             # Update user plan (Production only)
             if is_production_webhook:
-                db.collection("users").document(uid).update({
+                user_plan_update = {
                     "plan": plan,
                     "subscriptionPlatform": "ios",
                     "planUpdatedAt": firestore.SERVER_TIMESTAMP,
-                    "appleEntitlementId": f"apple:{original_transaction_id}" if original_transaction_id else None,
-                })
+                    "appleEntitlementId": entitlement_id,
+                }
         else:
             logger.warning(
                 "Notification received without user mapping: originalTransactionId=%s",
@@ -1031,7 +1263,8 @@ async def handle_app_store_notifications(req: AppStoreNotificationRequest):
             )
 
         if notification_uuid:
-            db.collection("apple_notifications").document(notification_uuid).set(
+            batch.set(
+                db.collection("apple_notifications").document(notification_uuid),
                 {
                     "notificationType": notification_type,
                     "subtype": subtype,
@@ -1044,6 +1277,27 @@ async def handle_app_store_notifications(req: AppStoreNotificationRequest):
                 merge=True,
             )
 
+        await asyncio.to_thread(batch.commit)
+
+        # update() fails on a missing users doc, so it goes out after the batch:
+        # the transaction/entitlement/account state for a REFUND or EXPIRED is
+        # already persisted if it raises
+        if user_plan_update:
+            await asyncio.to_thread(user_ref.update, user_plan_update)
+
+        if sync_account:
+            logger.info(
+                 "subscription_state_transition",
+                 extra={
+                     "uid": uid,
+                     "accountId": account_id,
+                     "toPlan": plan,
+                     "reason": f"notification_{notification_type}",
+                     "transactionId": fields.get("transactionId"),
+                     "expiresAt": fields.get("expiresDateMs")
+                 }
+             )
+
         if lock_acquired:
             await idempotency.mark_completed(notification_uuid, result={"status": status})
 
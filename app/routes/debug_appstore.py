@@ -8,27 +8,15 @@ from fastapi.responses import JSONResponse
 
 from app.services.apple import apple_service
 from app.util_models import BillingConfirmRequest
+from app.config import is_production_runtime
 from app.routes.billing import _extract_transaction_fields
 
 logger = logging.getLogger("app.debug.appstore")
 router = APIRouter(prefix="/debug", tags=["Debug"], include_in_schema=False)
 
 
-def _runtime_env() -> str:
-    return (
-        os.getenv("APP_ENV")
-        or os.getenv("ENV")
-        or os.getenv("ENVIRONMENT")
-        or "development"
-    )
-
-
-def _is_production_runtime() -> bool:
-    return _runtime_env().lower() == "production"
-
-
 def _validate_debug_secret(provided: Optional[str]) -> None:
-    if _is_production_runtime():
+    if is_production_runtime():
         raise HTTPException(status_code=404, detail="not found")
     secret = os.getenv("APPSTORE_DEBUG_SECRET")
     if not secret:
@@ -1,11 +1,13 @@
+import asyncio
+import time
 from urllib.parse import urlencode
 from datetime import datetime, timedelta, timezone
 
-import requests
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import RedirectResponse, JSONResponse
 
 from app.dependencies import get_current_user, get_current_user_optional, CurrentUser
+from app.http_client import http_client
 from app.google_calendar import (
     _sign_state,
     _verify_state,
@@ -36,7 +38,8 @@ async def google_oauth_start(
     if token:
         try:
             from firebase_admin import auth
-            decoded = auth.verify_id_token(token)
+            # [PERF] Key fetch + signature check must not block the event loop
+            decoded = await asyncio.to_thread(auth.verify_id_token, token)
             uid = decoded["uid"]
         except Exception:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -49,7 +52,7 @@ async def google_oauth_start(
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Google OAuth is not configured")
 
-    state = _sign_state({"uid": uid, "return_to": return_to, "ts": datetime.now(timezone.utc).timestamp()})
+    state = _sign_state({"uid": uid, "return_to": return_to, "ts": int(time.time())})
     params = {
         "client_id": GOOGLE_CLIENT_ID,
         "redirect_uri": GOOGLE_REDIRECT_URI,
@@ -65,7 +68,7 @@ async def google_oauth_start(
 
 
 @router.get("/oauth/callback")
-async def google_oauth_callback(code: str, state: str):
+async def google_oauth_callback(request: Request, code: str, state: str):
     try:
         payload = _verify_state(state)
         uid = payload["uid"]
@@ -76,7 +79,8 @@ async def google_oauth_callback(code: str, state: str):
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Google OAuth is not configured")
 
-    resp = requests.post(
+    # [PERF] Shared keep-alive client: no event-loop blocking, no per-login TLS handshake
+    resp = await http_client(request).post(
         "https://oauth2.googleapis.com/token",
         data={
             "code": code,
@@ -85,7 +89,7 @@ async def google_oauth_callback(code: str, state: str):
             "redirect_uri": GOOGLE_REDIRECT_URI,
             "grant_type": "authorization_code",
         },
-        timeout=10,
+        timeout=10.0,
     )
     if resp.status_code != 200:
         raise HTTPException(status_code=400, detail=f"Failed to exchange token: {resp.text}")
@@ -97,7 +101,7 @@ async def google_oauth_callback(code: str, state: str):
     if not access_token:
         raise HTTPException(status_code=400, detail="No access_token in response")
 
-    save_tokens(uid, access_token, refresh_token, expires_in)
+    await asyncio.to_thread(save_tokens, uid, access_token, refresh_token, expires_in)
 
     # Deep link / web redirect
     if return_to.startswith("http://") or return_to.startswith("https://") or return_to.startswith("/"):
@@ -113,7 +117,7 @@ async def google_oauth_callback(code: str, state: str):
 
 @integrations_router.get("/status")
 async def google_integration_status(current_user: CurrentUser = Depends(get_current_user)):
-    tokens = load_tokens(current_user.uid)
+    tokens = await asyncio.to_thread(load_tokens, current_user.uid)
     if not tokens:
         return {"connected": False}
 
@@ -134,7 +138,7 @@ async def google_integration_status(current_user: CurrentUser = Depends(get_curr
 
 @integrations_router.delete("")
 async def google_integration_disconnect(current_user: CurrentUser = Depends(get_current_user)):
-    existed = delete_tokens(current_user.uid)
+    existed = await asyncio.to_thread(delete_tokens, current_user.uid)
     return {"disconnected": existed}
 
 
@@ -159,7 +163,7 @@ async def list_google_calendar_events(
         raise HTTPException(status_code=400, detail="end must be after start")
 
     try:
-        events = list_events(current_user.uid, s, e, top=top, calendar_id=calendar_id)
+        events = await asyncio.to_thread(list_events, current_user.uid, s, e, top=top, calendar_id=calendar_id)
     except RuntimeError as ex:
         msg = str(ex)
         if "not connected" in msg:
@@ -1,6 +1,8 @@
+import asyncio
 import logging
-import re
-import uuid
+import secrets
+import string
+import time
 from datetime import timedelta
 from typing import List, Optional
 from urllib.parse import parse_qs, urlparse
@@ -8,6 +10,7 @@ from urllib.parse import parse_qs, urlparse
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.dependencies import CurrentUser, get_current_user
+from app.firebase import db
 from app.routes.sessions import (
     _ensure_session_meta,
     _now_timestamp,
@@ -21,17 +24,88 @@ from app.util_models import ImportYouTubeRequest, ImportYouTubeResponse, YouTube
 router = APIRouter()
 logger = logging.getLogger("app.imports")
 
+# [PERF] Video ids are matched with str.strip/str.find instead of regexes;
+# _parse_youtube_video_id runs on every import/check request.
+_VIDEO_ID_CHARS = string.ascii_letters + string.digits + "_-"
+_VIDEO_ID_MIN_LEN = 6
+_URL_ID_PREFIXES = ("v=", "youtu.be/", "shorts/", "embed/")
+
 try:
     from youtube_transcript_api import YouTubeTranscriptApi
     from youtube_transcript_api._errors import (
         TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
     )
+    # Legacy classmethod (<1.0), bound once; None on releases that only have .list()
+    _LIST_TRANSCRIPTS = getattr(YouTubeTranscriptApi, "list_transcripts", None)
     YT_TRANSCRIPT_AVAILABLE = True
 except ImportError:
     YouTubeTranscriptApi = None
+    _LIST_TRANSCRIPTS = None
     TranscriptsDisabled = NoTranscriptFound = VideoUnavailable = None
     YT_TRANSCRIPT_AVAILABLE = False
 
+# [PERF] video_id -> (YouTubeCheckResponse, expire_at). The desktop client
+# re-checks the same video while the user edits the import form; a hit skips
+# the proxied round trip to YouTube. Definitive "no captions" answers are
+# kept briefly; proxy/internal failures are never cached.
+_CHECK_CACHE: dict[str, tuple[YouTubeCheckResponse, float]] = {}
+_CHECK_CACHE_TTL = 600  # 10 minutes
+_CHECK_CACHE_NEGATIVE_TTL = 60
+_CHECK_CACHE_MAX_SIZE = 1024
+
+
+def _check_cache_get(video_id: str) -> Optional[YouTubeCheckResponse]:
+    entry = _CHECK_CACHE.get(video_id)
+    if entry is None:
+        return None
+    response, expire_at = entry
+    if time.monotonic() > expire_at:
+        _CHECK_CACHE.pop(video_id, None)
+        return None
+    return response
+
+
+def _check_cache_set(video_id: str, response: YouTubeCheckResponse) -> YouTubeCheckResponse:
+    if len(_CHECK_CACHE) >= _CHECK_CACHE_MAX_SIZE:
+        now = time.monotonic()
+        for k in [k for k, (_, exp) in _CHECK_CACHE.items() if now > exp]:
+            _CHECK_CACHE.pop(k, None)
+    if len(_CHECK_CACHE) >= _CHECK_CACHE_MAX_SIZE:
+        # Still full after eviction — drop oldest 20%
+        for k in list(_CHECK_CACHE.keys())[:_CHECK_CACHE_MAX_SIZE // 5]:
+            _CHECK_CACHE.pop(k, None)
+    ttl = _CHECK_CACHE_TTL if response.available else _CHECK_CACHE_NEGATIVE_TTL
+    _CHECK_CACHE[video_id] = (response, time.monotonic() + ttl)
+    return response
+
+
+def _list_tracks(video_id: str, attempt: int, max_attempts: int) -> List[YouTubeTrack]:
+    from app.services.youtube import _build_proxy_config
+
+    if _LIST_TRANSCRIPTS is not None:
+        # Legacy classmethod (<1.0). No proxy support upstream.
+        transcript_list = _LIST_TRANSCRIPTS(video_id)
+    else:
+        proxy_config = _build_proxy_config()
+        if proxy_config is not None:
+            logger.info(
+                f"Using proxy for YouTube list_transcripts "
+                f"(video={video_id} attempt={attempt}/{max_attempts})"
+            )
+        ytt = YouTubeTranscriptApi(proxy_config=proxy_config) if proxy_config is not None else YouTubeTranscriptApi()
+        transcript_list = ytt.list(video_id)
+
+    tracks = []
+    for t in transcript_list:
+        tracks.append(YouTubeTrack(
+            language=t.language,
+            language_code=t.language_code,
+            is_generated=t.is_generated,
+            is_translatable=t.is_translatable
+        ))
+    return tracks
+
+
 @router.post("/imports/youtube/check", response_model=YouTubeCheckResponse)
 async def check_youtube_transcript(req: YouTubeCheckRequest):
     """
@@ -54,46 +128,31 @@ async def check_youtube_transcript(req: YouTubeCheckRequest):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    from app.services.youtube import _build_proxy_config, _is_blocked_exception
-    import time as _time
+    cached = _check_cache_get(video_id)
+    if cached is not None:
+        return cached
+
+    from app.services.youtube import _is_blocked_exception
     import random as _random
 
     MAX_ATTEMPTS = 4
     BACKOFF = (1.0, 2.5, 5.0)
     for attempt in range(1, MAX_ATTEMPTS + 1):
         try:
-            if hasattr(YouTubeTranscriptApi, "list_transcripts"):
-                # Legacy classmethod (<1.0). No proxy support upstream.
-                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            else:
-                proxy_config = _build_proxy_config()
-                if proxy_config is not None:
-                    logger.info(
-                        f"Using proxy for YouTube list_transcripts "
-                        f"(video={video_id} attempt={attempt}/{MAX_ATTEMPTS})"
-                    )
-                ytt = YouTubeTranscriptApi(proxy_config=proxy_config) if proxy_config is not None else YouTubeTranscriptApi()
-                transcript_list = ytt.list(video_id)
-
-            tracks = []
-            for t in transcript_list:
-                tracks.append(YouTubeTrack(
-                    language=t.language,
-                    language_code=t.language_code,
-                    is_generated=t.is_generated,
-                    is_translatable=t.is_translatable
-                ))
-            return YouTubeCheckResponse(
+            # [PERF] The listing is a blocking HTTP fetch (through the proxy);
+            # run it in a worker thread so other requests keep being served.
+            tracks = await asyncio.to_thread(_list_tracks, video_id, attempt, MAX_ATTEMPTS)
+            return _check_cache_set(video_id, YouTubeCheckResponse(
                 videoId=video_id,
                 available=len(tracks) > 0,
                 tracks=tracks
-            )
+            ))
         except TranscriptsDisabled:
-            return YouTubeCheckResponse(videoId=video_id, available=False, reason="transcripts_disabled")
+            return _check_cache_set(video_id, YouTubeCheckResponse(videoId=video_id, available=False, reason="transcripts_disabled"))
         except NoTranscriptFound:
-            return YouTubeCheckResponse(videoId=video_id, available=False, reason="no_transcript")
+            return _check_cache_set(video_id, YouTubeCheckResponse(videoId=video_id, available=False, reason="no_transcript"))
         except VideoUnavailable:
-            return YouTubeCheckResponse(videoId=video_id, available=False, reason="video_unavailable")
+            return _check_cache_set(video_id, YouTubeCheckResponse(videoId=video_id, available=False, reason="video_unavailable"))
         except Exception as e:
             if _is_blocked_exception(e) and attempt < MAX_ATTEMPTS:
                 wait = BACKOFF[min(attempt - 1, len(BACKOFF) - 1)] * _random.uniform(0.8, 1.2)
@@ -101,7 +160,7 @@ async def check_youtube_transcript(req: YouTubeCheckRequest):
                     f"YouTube blocked check attempt {attempt}/{MAX_ATTEMPTS} for {video_id}; "
                     f"retrying in {wait:.1f}s with a fresh proxy IP"
                 )
-                _time.sleep(wait)
+                await asyncio.sleep(wait)
                 continue
             logger.error(f"Unexpected error checking YouTube video {video_id}: {e}")
             return YouTubeCheckResponse(
@@ -114,14 +173,102 @@ async def check_youtube_transcript(req: YouTubeCheckRequest):
 
 
 
+_FAST_YOUTU_BE_HOSTS = frozenset({"youtu.be", "www.youtu.be"})
+_FAST_YOUTUBE_HOSTS = frozenset({"youtube.com", "www.youtube.com", "m.youtube.com"})
+
+
+def _is_video_id(value: str) -> bool:
+    # Equivalent to re.fullmatch(r"[A-Za-z0-9_-]{6,}", value)
+    return len(value) >= _VIDEO_ID_MIN_LEN and not value.strip(_VIDEO_ID_CHARS)
+
+
+def _scan_video_id(cleaned: str) -> Optional[str]:
+    """
+    Last-resort extraction: the leftmost ``v=`` / ``youtu.be/`` / ``shorts/`` /
+    ``embed/`` followed by at least six id characters, taking the whole run.
+    Same result as re.search(r"(?:v=|youtu\\.be/|shorts/|embed/)([A-Za-z0-9_-]{6,})").
+    The prefixes start with distinct characters, so at most one can match at
+    any position and the earliest accepted match wins.
+    """
+    best_start = len(cleaned)
+    best: Optional[str] = None
+    for prefix in _URL_ID_PREFIXES:
+        pos = cleaned.find(prefix)
+        while pos != -1 and pos < best_start:
+            tail = cleaned[pos + len(prefix):]
+            run = len(tail) - len(tail.lstrip(_VIDEO_ID_CHARS))
+            if run >= _VIDEO_ID_MIN_LEN:
+                best_start = pos
+                best = tail[:run]
+                break
+            pos = cleaned.find(prefix, pos + 1)
+    return best
+
+
+def _cut_at(value: str, delims: str) -> str:
+    end = len(value)
+    for delim in delims:
+        idx = value.find(delim, 0, end)
+        if idx != -1:
+            end = idx
+    return value[:end]
+
+
+def _fast_parse_video_id(cleaned: str) -> Optional[str]:
+    """
+    [PERF] Handles the common share/watch URL shapes with plain string
+    slicing so the happy path skips urlparse/parse_qs. Returns None for
+    anything unusual (other hosts, percent-encoding, ports, ...) and the
+    caller falls back to the full parser, so results never diverge.
+    """
+    if cleaned.startswith("https://"):
+        rest = cleaned[8:]
+    elif cleaned.startswith("http://"):
+        rest = cleaned[7:]
+    elif cleaned.startswith("http"):
+        return None
+    else:
+        rest = cleaned
+
+    host, _, tail = rest.partition("/")
+    host = host.lower()
+    candidate = None
+    if host in _FAST_YOUTU_BE_HOSTS:
+        candidate = _cut_at(tail, "/?#")
+    elif host in _FAST_YOUTUBE_HOSTS:
+        if tail.startswith("watch?"):
+            query = _cut_at(tail[6:], "#")
+            if query.startswith("v="):
+                start = 2
+            else:
+                start = query.find("&v=")
+                if start == -1:
+                    return None
+                start += 3
+            candidate = _cut_at(query[start:], "&")
+        else:
+            for prefix in ("shorts/", "embed/", "v/"):
+                if tail.startswith(prefix):
+                    candidate = _cut_at(tail[len(prefix):], "/?#")
+                    break
+
+    if candidate and _is_video_id(candidate):
+        return candidate
+    return None
+
+
 def _parse_youtube_video_id(url: str) -> str:
     cleaned = (url or "").strip()
     if not cleaned:
         raise ValueError("URL is required")
 
-    if re.fullmatch(r"[A-Za-z0-9_-]{6,}", cleaned):
+    if _is_video_id(cleaned):
         return cleaned
 
+    video_id = _fast_parse_video_id(cleaned)
+    if video_id:
+        return video_id
+
     parsed = urlparse(cleaned)
     if not parsed.netloc and not cleaned.startswith("http"):
         parsed = urlparse(f"https://{cleaned}")
@@ -145,9 +292,9 @@ def _parse_youtube_video_id(url: str) -> str:
                 if video_id:
                     return video_id
 
-    match = re.search(r"(?:v=|youtu\.be/|shorts/|embed/)([A-Za-z0-9_-]{6,})", cleaned)
-    if match:
-        return match.group(1)
+    video_id = _scan_video_id(cleaned)
+    if video_id:
+        return video_id
 
     raise ValueError("Invalid YouTube URL")
 
@@ -161,12 +308,7 @@ def _build_language_priority(language: Optional[str]) -> List[str]:
 
 
 def _format_transcript(items: List[dict]) -> str:
-    texts: List[str] = []
-    for item in items:
-        text = (item.get("text") or "").strip()
-        if text:
-            texts.append(text)
-    return "\n".join(texts)
+    return "\n".join([text for item in items if (text := (item.get("text") or "").strip())])
 
 
 def _infer_duration_sec(items: List[dict]) -> Optional[float]:
@@ -199,8 +341,8 @@ async def import_youtube(req: ImportYouTubeRequest, current_user: CurrentUser =
 
     now = _now_timestamp()
     owner_uid = current_user.uid
-    # ID format: mode-timestamp-uuid
-    session_id = f"{req.mode}-{int(now.timestamp() * 1000)}-{uuid.uuid4().hex[:6]}"
+    # ID format: mode-timestamp-6 random hex chars
+    session_id = f"{req.mode}-{int(now.timestamp() * 1000)}-{secrets.token_hex(3)}"
     title = (req.title or "").strip() or "YouTube取り込み"
 
     # Determine status based on provided transcript
@@ -230,6 +372,8 @@ async def import_youtube(req: ImportYouTubeRequest, current_user: CurrentUser =
         "durationSec": 0, # Unknown initially
         "audioPath": None, # Could be None for text-only import
         "transcriptText": req.transcriptText if has_transcript else "",
+        "hasTranscript": has_transcript,
+        "transcriptTextLen": len(req.transcriptText) if has_transcript else 0,
         "transcriptSource": req.source or "youtube",
         "transcriptLang": req.transcriptLang or req.language, # [NEW]
         "isAutoGenerated": req.isAutoGenerated, # [NEW]
@@ -245,17 +389,21 @@ async def import_youtube(req: ImportYouTubeRequest, current_user: CurrentUser =
         "sourceVideoId": video_id,
     }
 
+    # [PERF] Session doc, sessionMeta and member writes commit together in one RPC
+    batch = db.batch()
     doc_ref = _session_doc_ref(session_id)
-    doc_ref.set(data)
+    batch.set(doc_ref, data)
 
-    _ensure_session_meta(owner_uid, session_id, "OWNER", last_opened_at=now)
+    _ensure_session_meta(owner_uid, session_id, "OWNER", last_opened_at=now, batch=batch)
     _upsert_session_member(
         session_id=session_id,
         user_id=owner_uid,
         role="owner",
         source="owner",
         display_name=current_user.display_name,
+        batch=batch,
     )
+    batch.commit()
 
     if has_transcript:
         # Transcript provided: Bypass download/STT and trigger Summary/Quiz directly
@@ -12,6 +12,8 @@ Design principles:
 - No "error" in user-facing responses (use errorReason for debugging)
 """
 
+import asyncio
+import functools
 import logging
 import hashlib
 import uuid
@@ -46,18 +48,47 @@ router = APIRouter()
 LEASE_DURATION_SECONDS = 300  # 5 minutes lease for running jobs
 JOB_EXPIRY_DAYS = 7  # Keep job records for 7 days
 
+# Firestore status strings, resolved once
+_STATUS_QUEUED = AsyncJobStatus.QUEUED.value
+_STATUS_RUNNING = AsyncJobStatus.RUNNING.value
+_STATUS_SUCCEEDED = AsyncJobStatus.SUCCEEDED.value
+_STATUS_FAILED = AsyncJobStatus.FAILED.value
+_REUSABLE_STATUSES = frozenset({_STATUS_QUEUED, _STATUS_RUNNING, _STATUS_SUCCEEDED})
+_FINISHED_STATUSES = frozenset({_STATUS_SUCCEEDED, _STATUS_FAILED})
+# _update_job_status takes enum members rather than raw strings
+_TERMINAL_JOB_STATUSES = frozenset({AsyncJobStatus.SUCCEEDED, AsyncJobStatus.FAILED})
+
+# [PERF] Fields read by GET /jobs/{jobId}; skips request params and other
+# worker bookkeeping on every poll.
+_JOB_STATUS_FIELDS = [
+    "id", "type", "sessionId", "accountId", "status", "stage",
+    "createdAt", "updatedAt", "completedAt", "resultUrl", "errorReason",
+    "progress", "partial",
+]
+# Ownership fields checked by the :generate endpoints (sessions can carry
+# the full transcript, which is never needed there).
+_SESSION_OWNER_FIELDS = ["ownerAccountId", "ownerUserId", "ownerUid"]
+
 
 # =============================================================================
 # Helpers
 # =============================================================================
 
+@functools.lru_cache(maxsize=8)
+def _collection(client, name: str):
+    # [PERF] CollectionReferences are immutable; build each once per client
+    # rather than on every poll. Keyed on the client so a swapped `db`
+    # (tests, emulator) gets its own refs.
+    return client.collection(name)
+
+
 def _jobs_collection():
-    return db.collection("jobs")
+    return _collection(db, "jobs")
 
 
 def _job_keys_collection():
     """Collection for idempotency key -> jobId mapping."""
-    return db.collection("job_keys")
+    return _collection(db, "job_keys")
 
 
 def _compute_idempotency_key(
@@ -75,16 +106,63 @@ def _compute_idempotency_key(
     - accountId (prevent cross-account collisions)
     - params hash (promptVersion, mode, etc.)
     """
-    params_str = ""
-    if params:
-        # Sort keys for consistent hashing
-        sorted_params = sorted(params.items())
-        params_str = str(sorted_params)
+    # Sort keys for consistent hashing
+    params_items = tuple(sorted(params.items())) if params else ()
+    return _idempotency_key_for(session_id, job_type, account_id, params_items)
+
 
+# [PERF] Clients poll/retry generate with identical inputs; memoize the hash.
+@functools.lru_cache(maxsize=4096)
+def _idempotency_key_for(
+    session_id: str,
+    job_type: str,
+    account_id: str,
+    params_items: tuple,
+) -> str:
+    # Same encoding as before memoization (str of the sorted item list), so
+    # existing job_keys ids keep matching
+    params_str = str(list(params_items)) if params_items else ""
     key_source = f"{session_id}:{job_type}:{account_id}:{params_str}"
     return hashlib.sha256(key_source.encode()).hexdigest()[:32]
 
 
+def _is_job_reusable(job_data: dict, now: datetime) -> bool:
+    # Check if job is still valid (not expired/deleted)
+    status = job_data.get("status")
+    if status in _REUSABLE_STATUSES:
+        return True
+    # Job failed - allow re-creation
+    if status == _STATUS_FAILED:
+        # Check if enough time has passed for retry
+        failed_at = job_data.get("completedAt")
+        if failed_at:
+            if hasattr(failed_at, 'replace') and failed_at.tzinfo is None:
+                failed_at = failed_at.replace(tzinfo=timezone.utc)
+            # Allow retry after 30 seconds
+            if now - failed_at < timedelta(seconds=30):
+                return True
+    return False
+
+
+def _reusable_job(key_doc, transaction, now: datetime) -> Optional[tuple[str, dict]]:
+    """
+    (jobId, job_data) of the job a job_keys doc points at, if it can be reused.
+
+    Always reads jobs/{id}: workers (task_queue._update_root_job_status)
+    only update the job doc, so it is the one source of truth for status.
+    """
+    if not key_doc.exists:
+        return None
+    existing_job_id = key_doc.to_dict().get("jobId")
+    if existing_job_id:
+        job_doc = _jobs_collection().document(existing_job_id).get(transaction=transaction)
+        if job_doc.exists:
+            job_data = job_doc.to_dict()
+            if _is_job_reusable(job_data, now):
+                return existing_job_id, job_data
+    return None
+
+
 def _get_or_create_job(
     idempotency_key: str,
     session_id: str,
@@ -105,28 +183,9 @@ def _get_or_create_job(
         key_doc = key_ref.get(transaction=transaction)
         now = datetime.now(timezone.utc)
 
-        if key_doc.exists:
-            # Existing job found
-            existing_job_id = key_doc.to_dict().get("jobId")
-            if existing_job_id:
-                job_doc = _jobs_collection().document(existing_job_id).get(transaction=transaction)
-                if job_doc.exists:
-                    job_data = job_doc.to_dict()
-                    # Check if job is still valid (not expired/deleted)
-                    status = job_data.get("status")
-                    if status in [AsyncJobStatus.QUEUED.value, AsyncJobStatus.RUNNING.value,
-                                  AsyncJobStatus.SUCCEEDED.value]:
-                        return existing_job_id, job_data, False
-                    # Job failed - allow re-creation
-                    if status == AsyncJobStatus.FAILED.value:
-                        # Check if enough time has passed for retry
-                        failed_at = job_data.get("completedAt")
-                        if failed_at:
-                            if hasattr(failed_at, 'replace') and failed_at.tzinfo is None:
-                                failed_at = failed_at.replace(tzinfo=timezone.utc)
-                            # Allow retry after 30 seconds
-                            if now - failed_at < timedelta(seconds=30):
-                                return existing_job_id, job_data, False
+        existing = _reusable_job(key_doc, transaction, now)
+        if existing is not None:
+            return existing[0], existing[1], False
 
         # Create new job
         new_job_id = str(uuid.uuid4())
@@ -136,7 +195,7 @@ def _get_or_create_job(
             "sessionId": session_id,
             "userId": user_id,
             "accountId": account_id,
-            "status": AsyncJobStatus.QUEUED.value,
+            "status": _STATUS_QUEUED,
             "stage": "queued",  # Stage for progress UI
             "idempotencyKey": idempotency_key,
             "createdAt": now,
@@ -177,19 +236,23 @@ def _update_job_status(
     result_url: Optional[str] = None,
     progress: Optional[float] = None,
 ):
-    """Update job status (used by workers)."""
-    now = datetime.now(timezone.utc)
+    """
+    Update job status (used by workers).
+
+    updatedAt/startedAt/completedAt are stamped by Firestore
+    (SERVER_TIMESTAMP); only leaseUntil needs a client-side clock.
+    """
     update_data = {
         "status": status.value,
-        "updatedAt": now,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
     }
 
     if status == AsyncJobStatus.RUNNING:
-        update_data["startedAt"] = now
-        update_data["leaseUntil"] = now + timedelta(seconds=LEASE_DURATION_SECONDS)
+        update_data["startedAt"] = firestore.SERVER_TIMESTAMP
+        update_data["leaseUntil"] = datetime.now(timezone.utc) + timedelta(seconds=LEASE_DURATION_SECONDS)
 
-    if status in [AsyncJobStatus.SUCCEEDED, AsyncJobStatus.FAILED]:
-        update_data["completedAt"] = now
+    if status in _TERMINAL_JOB_STATUSES:
+        update_data["completedAt"] = firestore.SERVER_TIMESTAMP
         update_data["leaseUntil"] = None
 
     if error_reason is not None:
@@ -219,7 +282,9 @@ async def get_job_status(
     Lightweight endpoint for polling - does not include LLM results.
     Only the job owner (same accountId) can view job status.
     """
-    job_doc = _jobs_collection().document(job_id).get()
+    job_doc = await asyncio.to_thread(
+        _jobs_collection().document(job_id).get, field_paths=_JOB_STATUS_FIELDS
+    )
 
     if not job_doc.exists:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -256,29 +321,28 @@ async def get_job_status(
     )
 
 
-# =============================================================================
-# POST /sessions/{sessionId}/artifacts/summary:generate
-# =============================================================================
-
-@router.post(
-    "/sessions/{session_id}/artifacts/summary:generate",
-    response_model=GenerateResponse,
-    status_code=202,
-)
-async def generate_summary(
+async def _generate_artifact(
     session_id: str,
-    body: GenerateRequest = GenerateRequest(),
-    background_tasks: BackgroundTasks = None,
-    current_user: CurrentUser = Depends(get_current_user),
-):
+    body: GenerateRequest,
+    background_tasks: Optional[BackgroundTasks],
+    current_user: CurrentUser,
+    job_type: AsyncJobType,
+    enqueue_fn,
+    estimated_seconds: int,
+) -> GenerateResponse:
     """
-    Queue summary generation (async).
+    Shared body of the :generate endpoints (summary, quiz).
 
-    Returns 202 Accepted with jobId for status tracking.
-    Idempotent: same request returns same jobId.
+    Firestore reads and the get-or-create transaction are blocking, so they
+    run in worker threads; enqueueing stays on the loop (its local fallback
+    schedules coroutines).
     """
+    log_tag = f"[generate_{job_type.value}]"
+
     # Verify session exists and user has access
-    session_doc = db.collection("sessions").document(session_id).get()
+    session_doc = await asyncio.to_thread(
+        _collection(db, "sessions").document(session_id).get, field_paths=_SESSION_OWNER_FIELDS
+    )
     if not session_doc.exists:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -298,16 +362,17 @@ async def generate_summary(
     }
     idempotency_key = _compute_idempotency_key(
         session_id,
-        AsyncJobType.SUMMARY.value,
+        job_type.value,
         current_user.account_id,
         params if not body.force else None  # force=True creates new job
     )
 
     # Get or create job
-    job_id, job_data, is_new = _get_or_create_job(
+    job_id, job_data, is_new = await asyncio.to_thread(
+        _get_or_create_job,
         idempotency_key=idempotency_key,
         session_id=session_id,
-        job_type=AsyncJobType.SUMMARY,
+        job_type=job_type,
         user_id=current_user.uid,
         account_id=current_user.account_id,
         request_params=params,
@@ -316,20 +381,20 @@ async def generate_summary(
     # If new job, enqueue to Cloud Tasks
     if is_new:
         try:
-            enqueue_summarize_task(
+            enqueue_fn(
                 session_id=session_id,
                 job_id=job_id,
                 user_id=current_user.uid,
                 background_tasks=background_tasks,
             )
-            logger.info(f"[generate_summary] Queued job {job_id} for session {session_id}")
+            logger.info(f"{log_tag} Queued job {job_id} for session {session_id}")
         except Exception as e:
-            logger.error(f"[generate_summary] Failed to enqueue job {job_id}: {e}")
+            logger.error(f"{log_tag} Failed to enqueue job {job_id}: {e}")
             # Mark job as failed
-            _update_job_status(job_id, AsyncJobStatus.FAILED, error_reason=str(e))
+            await asyncio.to_thread(_update_job_status, job_id, AsyncJobStatus.FAILED, error_reason=str(e))
             raise HTTPException(status_code=500, detail="Failed to queue job")
     else:
-        logger.info(f"[generate_summary] Reusing existing job {job_id} for session {session_id}")
+        logger.info(f"{log_tag} Reusing existing job {job_id} for session {session_id}")
 
     status_url = f"/jobs/{job_id}"
 
@@ -337,93 +402,62 @@ async def generate_summary(
         jobId=job_id,
         status=AsyncJobStatus(job_data["status"]),
         statusUrl=status_url,
-        estimatedSeconds=30 if is_new else None,
-        existingResult=job_data["status"] == AsyncJobStatus.SUCCEEDED.value,
+        estimatedSeconds=estimated_seconds if is_new else None,
+        existingResult=job_data["status"] == _STATUS_SUCCEEDED,
     )
 
 
 # =============================================================================
-# POST /sessions/{sessionId}/artifacts/quiz:generate
+# POST /sessions/{sessionId}/artifacts/summary:generate
 # =============================================================================
 
 @router.post(
-    "/sessions/{session_id}/artifacts/quiz:generate",
+    "/sessions/{session_id}/artifacts/summary:generate",
     response_model=GenerateResponse,
     status_code=202,
 )
-async def generate_quiz(
+async def generate_summary(
     session_id: str,
     body: GenerateRequest = GenerateRequest(),
     background_tasks: BackgroundTasks = None,
     current_user: CurrentUser = Depends(get_current_user),
 ):
     """
-    Queue quiz generation (async).
+    Queue summary generation (async).
 
     Returns 202 Accepted with jobId for status tracking.
     Idempotent: same request returns same jobId.
     """
-    # Verify session exists and user has access
-    session_doc = db.collection("sessions").document(session_id).get()
-    if not session_doc.exists:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_doc.to_dict()
-    owner_account = session_data.get("ownerAccountId")
-    owner_uid = session_data.get("ownerUserId") or session_data.get("ownerUid")
-
-    # Check ownership
-    if owner_account != current_user.account_id and owner_uid != current_user.uid:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    # Compute idempotency key
-    params = {
-        "promptVersion": body.promptVersion,
-        "mode": body.mode,
-        "language": body.language,
-    }
-    idempotency_key = _compute_idempotency_key(
-        session_id,
-        AsyncJobType.QUIZ.value,
-        current_user.account_id,
-        params if not body.force else None
+    return await _generate_artifact(
+        session_id, body, background_tasks, current_user,
+        AsyncJobType.SUMMARY, enqueue_summarize_task, estimated_seconds=30,
     )
 
-    # Get or create job
-    job_id, job_data, is_new = _get_or_create_job(
-        idempotency_key=idempotency_key,
-        session_id=session_id,
-        job_type=AsyncJobType.QUIZ,
-        user_id=current_user.uid,
-        account_id=current_user.account_id,
-        request_params=params,
-    )
 
-    # If new job, enqueue to Cloud Tasks
-    if is_new:
-        try:
-            enqueue_quiz_task(
-                session_id=session_id,
-                job_id=job_id,
-                user_id=current_user.uid,
-                background_tasks=background_tasks,
-            )
-            logger.info(f"[generate_quiz] Queued job {job_id} for session {session_id}")
-        except Exception as e:
-            logger.error(f"[generate_quiz] Failed to enqueue job {job_id}: {e}")
-            _update_job_status(job_id, AsyncJobStatus.FAILED, error_reason=str(e))
-            raise HTTPException(status_code=500, detail="Failed to queue job")
-    else:
-        logger.info(f"[generate_quiz] Reusing existing job {job_id} for session {session_id}")
+# =============================================================================
+# POST /sessions/{sessionId}/artifacts/quiz:generate
+# =============================================================================
 
-    status_url = f"/jobs/{job_id}"
+@router.post(
+    "/sessions/{session_id}/artifacts/quiz:generate",
+    response_model=GenerateResponse,
+    status_code=202,
+)
+async def generate_quiz(
+    session_id: str,
+    body: GenerateRequest = GenerateRequest(),
+    background_tasks: BackgroundTasks = None,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Queue quiz generation (async).
 
-    return GenerateResponse(
-        jobId=job_id,
-        status=AsyncJobStatus(job_data["status"]),
-        statusUrl=status_url,
-        estimatedSeconds=45 if is_new else None,
-        existingResult=job_data["status"] == AsyncJobStatus.SUCCEEDED.value,
+    Returns 202 Accepted with jobId for status tracking.
+    Idempotent: same request returns same jobId.
+    """
+    return await _generate_artifact(
+        session_id, body, background_tasks, current_user,
+        AsyncJobType.QUIZ, enqueue_quiz_task, estimated_seconds=45,
     )
 
 
@@ -451,11 +485,11 @@ def start_job(job_id: str) -> Optional[dict]:
         now = datetime.now(timezone.utc)
 
         # Already completed
-        if status in [AsyncJobStatus.SUCCEEDED.value, AsyncJobStatus.FAILED.value]:
+        if status in _FINISHED_STATUSES:
             return None
 
         # Check lease
-        if status == AsyncJobStatus.RUNNING.value:
+        if status == _STATUS_RUNNING:
             lease_until = job_data.get("leaseUntil")
             if lease_until:
                 if hasattr(lease_until, 'replace') and lease_until.tzinfo is None:
@@ -466,7 +500,7 @@ def start_job(job_id: str) -> Optional[dict]:
 
         # Acquire lease
         update_data = {
-            "status": AsyncJobStatus.RUNNING.value,
+            "status": _STATUS_RUNNING,
             "startedAt": now,
             "updatedAt": now,
             "leaseUntil": now + timedelta(seconds=LEASE_DURATION_SECONDS),
@@ -500,8 +534,17 @@ def fail_job(job_id: str, error_reason: str, is_permanent: bool = False):
 
 
 def update_job_progress(job_id: str, progress: float):
-    """Update job progress (0.0 - 1.0)."""
-    _update_job_status(job_id, AsyncJobStatus.RUNNING, progress=progress)
+    """
+    Update job progress (0.0 - 1.0).
+
+    Writes only progress/updatedAt: the job is already RUNNING (start_job),
+    and going through _update_job_status would re-stamp startedAt and push
+    leaseUntil out on every tick.
+    """
+    _jobs_collection().document(job_id).update({
+        "progress": progress,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    })
 
 
 def update_job_stage(
@@ -519,10 +562,9 @@ def update_job_stage(
         progress: Progress value 0.0-1.0
         partial: Partial results dict (tldr, overview, keyPoints)
     """
-    now = datetime.now(timezone.utc)
     update_data = {
         "stage": stage,
-        "updatedAt": now,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
     }
 
     if progress is not None:
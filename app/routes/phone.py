@@ -16,6 +16,8 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timezone, timedelta
 from google.cloud import firestore
+import asyncio
+import functools
 import logging
 import secrets
 import hashlib
@@ -23,8 +25,14 @@ import os
 
 from firebase_admin import auth as fb_auth
 
+try:
+    from twilio.rest import Client as TwilioClient
+except ImportError:
+    TwilioClient = None
+
 from app.dependencies import get_current_user, CurrentUser
 from app.firebase import db
+from app.routes.auth import invalidate_canonical_cache, invalidate_pointer_cache
 
 router = APIRouter()
 logger = logging.getLogger("app.phone")
@@ -74,6 +82,17 @@ def _hash_otp(otp: str) -> str:
     return hashlib.sha256(otp.encode()).hexdigest()
 
 
+@functools.lru_cache(maxsize=1)
+def _twilio_client(account_sid: str, auth_token: str):
+    """
+    [PERF] One Twilio client per credential pair, so OTP sends reuse its
+    HTTP session (and pooled TLS connection) instead of building a new one.
+    """
+    if TwilioClient is None:
+        raise RuntimeError("twilio is not installed")
+    return TwilioClient(account_sid, auth_token)
+
+
 async def _send_sms(phone_e164: str, otp: str) -> bool:
     """
     Send SMS via Twilio or other provider.
@@ -95,9 +114,10 @@ async def _send_sms(phone_e164: str, otp: str) -> bool:
         return True
 
     try:
-        from twilio.rest import Client
-        client = Client(twilio_sid, twilio_token)
-        message = client.messages.create(
+        client = _twilio_client(twilio_sid, twilio_token)
+        # Twilio's client is blocking HTTP; keep the event loop free meanwhile
+        message = await asyncio.to_thread(
+            client.messages.create,
             body=f"Your ClassNote verification code is: {otp}",
             from_=twilio_from,
             to=phone_e164
@@ -441,6 +461,8 @@ async def confirm_phone_verification(
     try:
         transaction = db.transaction()
         result = confirm_and_merge(transaction)
+        invalidate_pointer_cache("phone_numbers", phone)
+        invalidate_canonical_cache(uid)
     except Exception as e:
         logger.error(f"[phone:confirm] Transaction failed: {e}")
         raise HTTPException(500, f"Failed to process verification: {str(e)}")
@@ -451,7 +473,9 @@ async def confirm_phone_verification(
     target_account_id = result["targetAccountId"]
 
     try:
-        custom_token = _create_firebase_custom_token(
+        # Signing may be an IAM signBlob RPC; keep it off the event loop
+        custom_token = await asyncio.to_thread(
+            _create_firebase_custom_token,
             target_account_id,
             {
                 "provider": "phone_verified",
@@ -590,6 +614,8 @@ async def link_phone(
     try:
         transaction = db.transaction()
         final_account_id = link_and_merge(transaction)
+        invalidate_pointer_cache("phone_numbers", phone)
+        invalidate_canonical_cache(uid)
     except Exception as e:
         logger.error(f"[phone/link] Failed: {e}")
         raise HTTPException(500, f"Failed to link phone: {str(e)}")
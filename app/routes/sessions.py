@@ -436,7 +436,9 @@ def _upsert_session_member(
     role: str,
     source: str,
     display_name: Optional[str] = None,
+    batch=None,
 ) -> dict:
+    """Writes go onto ``batch`` instead of straight to Firestore when one is given."""
     now = _now_timestamp()
     member_ref = _session_member_ref(session_id, user_id)
     member_doc = member_ref.get()
@@ -451,10 +453,9 @@ def _upsert_session_member(
         payload["source"] = source
         payload["joinedAt"] = now
         payload["createdAt"] = now
-    member_ref.set(payload, merge=True)
 
     # [NEW] Also update participants map in session doc
-    _session_doc_ref(session_id).set({
+    participants = {
         "participants": {
             user_id: {
                 "role": role,
@@ -462,11 +463,18 @@ def _upsert_session_member(
                 "updatedAt": now
             }
         }
-    }, merge=True)
+    }
+    if batch is not None:
+        batch.set(member_ref, payload, merge=True)
+        batch.set(_session_doc_ref(session_id), participants, merge=True)
+    else:
+        member_ref.set(payload, merge=True)
+        _session_doc_ref(session_id).set(participants, merge=True)
 
     return payload
 
-def _ensure_session_meta(user_id: str, session_id: str, role: str, last_opened_at: Optional[datetime] = None):
+def _ensure_session_meta(user_id: str, session_id: str, role: str, last_opened_at: Optional[datetime] = None, batch=None):
+    """Writes go onto ``batch`` instead of straight to Firestore when one is given."""
     now = _now_timestamp()
     meta_ref = db.collection("users").document(user_id).collection("sessionMeta").document(session_id)
     meta_doc = meta_ref.get()
@@ -477,9 +485,12 @@ def _ensure_session_meta(user_id: str, session_id: str, role: str, last_opened_a
         }
         if last_opened_at is not None:
             update["lastOpenedAt"] = last_opened_at
-        meta_ref.update(update)
+        if batch is not None:
+            batch.update(meta_ref, update)
+        else:
+            meta_ref.update(update)
         return
-    meta_ref.set({
+    payload = {
         "sessionId": session_id,
         "role": role,
         "isPinned": False,
@@ -487,7 +498,11 @@ def _ensure_session_meta(user_id: str, session_id: str, role: str, last_opened_a
         "lastOpenedAt": last_opened_at,
         "createdAt": now,
         "updatedAt": now,
-    })
+    }
+    if batch is not None:
+        batch.set(meta_ref, payload)
+    else:
+        meta_ref.set(payload)
 
 def _add_participant_to_session(session_id: str, user_id: str):
     _session_doc_ref(session_id).update({
@@ -677,6 +692,8 @@ async def _create_session_internal(
         "durationSec": None,
         "audioPath": None,
         "transcriptText": None,
+        "hasTranscript": False,
+        "transcriptTextLen": 0,
         "summaryStatus": None,
         "quizStatus": None,
         "sharedWith": {},
@@ -1606,6 +1623,8 @@ async def import_session_transcript(
     # Reuse valid update logic or direct update? Direct update for simplicity/speed
     update_data = {
         "transcriptText": body.text,
+        "hasTranscript": bool(body.text),
+        "transcriptTextLen": len(body.text) if body.text else 0,
         # [DISABLED] summaryStatus no longer auto-set — user triggers manually
         "status": "録音済み",
         "updatedAt": _now_timestamp()
@@ -2529,7 +2548,10 @@ async def append_transcript_chunks(
         update_data["status"] = "録音済み"
         update_data["endedAt"] = now
     if body.updateSessionTranscript:
-        update_data["transcriptText"] = await resolve_transcript_text_async(session_id)
+        transcript_text = await resolve_transcript_text_async(session_id)
+        update_data["transcriptText"] = transcript_text
+        update_data["hasTranscript"] = bool(transcript_text)
+        update_data["transcriptTextLen"] = len(transcript_text) if transcript_text else 0
 
     doc_ref.set(update_data, merge=True)
     await publish_session_event(session_id, "assets.updated", {"fields": ["transcript"]})
@@ -2649,7 +2671,10 @@ async def replace_transcript_chunks(
         "transcriptVersion": new_version,
     }
     if body.updateSessionTranscript:
-        update_data["transcriptText"] = await resolve_transcript_text_async(session_id)
+        transcript_text = await resolve_transcript_text_async(session_id)
+        update_data["transcriptText"] = transcript_text
+        update_data["hasTranscript"] = bool(transcript_text)
+        update_data["transcriptTextLen"] = len(transcript_text) if transcript_text else 0
     doc_ref.set(update_data, merge=True)
     await publish_session_event(session_id, "assets.updated", {"fields": ["transcript"]})
 
@@ -2744,6 +2769,8 @@ async def device_sync(
 
     if body.transcriptText is not None:
         update_data["transcriptText"] = body.transcriptText
+        update_data["hasTranscript"] = bool(body.transcriptText)
+        update_data["transcriptTextLen"] = len(body.transcriptText)
     if body.segments is not None:
         segments_payload = [seg.dict() for seg in body.segments]
         update_data["diarizedSegments"] = segments_payload
@@ -2869,6 +2896,7 @@ async def update_session(session_id: str, req: UpdateSessionRequest, current_use
     if req.transcriptText is not None:
         update_data["transcriptText"] = req.transcriptText
         update_data["hasTranscript"] = bool(req.transcriptText)
+        update_data["transcriptTextLen"] = len(req.transcriptText)
         update_data["transcriptUpdatedAt"] = _now_timestamp()
     
     if req.durationSec is not None:
@@ -4174,7 +4202,11 @@ async def upload_transcript_artifact(
             should_update_main = True
             
     if should_update_main:
-         doc_ref.update({"transcriptText": body.text})
+         doc_ref.update({
+             "transcriptText": body.text,
+             "hasTranscript": bool(body.text),
+             "transcriptTextLen": len(body.text) if body.text else 0,
+         })
          
     return {"status": "completed", "artifactId": artifact_id}
 
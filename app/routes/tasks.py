@@ -640,6 +640,8 @@ async def handle_import_youtube_task(request: Request):
         # Success - Note: No audioPath since we use transcript API instead of audio download
         doc_ref.update({
             "transcriptText": transcript,
+            "hasTranscript": bool(transcript),
+            "transcriptTextLen": len(transcript) if transcript else 0,
             "status": "録音済み",
             "transcriptSource": "youtube_caption",
             "updatedAt": datetime.now(timezone.utc)
@@ -668,6 +670,8 @@ async def handle_import_youtube_task(request: Request):
         doc_ref.update({
             "status": "failed", # Or specific error status
             "transcriptText": None,
+            "hasTranscript": False,
+            "transcriptTextLen": 0,
             "errorMessage": str(e), # Using generic field or create new?
             "updatedAt": datetime.now(timezone.utc)
         })
@@ -1961,6 +1965,8 @@ async def handle_transcribe_task_deprecated(request: Request):
             # If Main Mode is Google, update main transcript
             if transcription_mode == "cloud_google" or not data.get("transcriptText"):
                 updates["transcriptText"] = transcript_text
+                updates["hasTranscript"] = bool(transcript_text)
+                updates["transcriptTextLen"] = len(transcript_text) if transcript_text else 0
                 if segments:
                     updates["segments"] = segments
                 
@@ -2101,6 +2107,8 @@ async def handle_cleanup_sessions_task(request: Request):
              "status": "deleted_by_limit_cleanup",
              "audioPath": None, # Wipe reference
              "transcriptText": None, # Wipe text
+             "hasTranscript": False,
+             "transcriptTextLen": 0,
              "summaryMarkdown": None,
              "quizMarkdown": None,
              "playlist": None
@@ -4,6 +4,7 @@ import random
 import string
 import re
 import logging
+import time
 from datetime import datetime, timezone, timedelta
 from google.cloud import firestore
 from pydantic import BaseModel
@@ -29,6 +30,8 @@ from app.util_models import (
     CloudUsageReport,  # [FIX] 追加
 )
 from app.firebase import db
+from app.routes.auth import invalidate_canonical_cache, invalidate_pointer_cache
+from app.routes.billing import invalidate_uid_pointer_cache
 from app.services.account_deletion import (
     LOCKS_COLLECTION,
     REQUESTS_COLLECTION,
@@ -48,6 +51,9 @@ from app.services.apple import apple_service
 
 logger = logging.getLogger("app.users")
 
+# Entitlement statuses that grant the paid plan (hash lookup instead of a list scan)
+_ENTITLED_STATUSES = frozenset({"active", "grace", "billing_retry", "active_lifetime"})
+
 # [NEW] Plan Mapping
 PRODUCT_TO_PLAN = {
     "com.classnote.app.standard.monthly": "basic",
@@ -158,7 +164,7 @@ def _find_best_production_entitlement(account_id: str, now: datetime) -> tuple[O
 
             # Filter 2: Active status
             status = data.get("status", "unknown")
-            if status not in ["active", "grace", "billing_retry", "active_lifetime"]:
+            if status not in _ENTITLED_STATUSES:
                 continue
 
             # [FIX 2026-05-01] Trust status as authoritative.
@@ -545,6 +551,10 @@ async def set_apple_token(req: AppleTokenReq, current_user: CurrentUser = Depend
     token = req.appAccountToken
     uid = current_user.uid
     now = datetime.now(timezone.utc)
+    # The token pointer feeds /auth/canonicalize resolution
+    invalidate_canonical_cache(uid)
+    invalidate_pointer_cache("apple_app_account_tokens", token)
+    invalidate_uid_pointer_cache("apple_app_account_tokens", token)
 
     # Get current user data (single read)
     user_snap = db.collection("users").document(uid).get()
@@ -998,6 +1008,7 @@ async def get_me(
                      "standardOwnerUid": current_user.uid,
                      "updatedAt": now
                  }, merge=True)
+                 invalidate_pointer_cache("phone_numbers", token_phone)
                  
                  # Link
                  db.collection("uid_links").document(current_user.uid).set({
@@ -1106,6 +1117,7 @@ async def get_me(
             db.collection("phone_numbers").document(token_phone).set({
                 "standardOwnerUid": current_user.uid, "isVerified": True, "updatedAt": now
             }, merge=True)
+            invalidate_pointer_cache("phone_numbers", token_phone)
         except: pass
 
     # Case 2: [FIX] phone_in_db from users/links but NOT in account -> Sync to account
@@ -1217,7 +1229,7 @@ async def get_me(
                     elif ent_owner != account_id:
                         logger.warning(f"[/users/me] Entitlement ownership mismatch: ent.owner={ent_owner}, account={account_id}")
                     # Check: Status is valid
-                    elif ent_status not in ["active", "grace", "billing_retry", "active_lifetime"]:
+                    elif ent_status not in _ENTITLED_STATUSES:
                         logger.info(f"[/users/me] Entitlement {apple_ent_id} status={ent_status} - not active")
                     # [FIX 2026-05-01] Trust status="active"/"grace"/"billing_retry" as
                     # authoritative even if currentPeriodEnd is past. App Store ASN2 /
@@ -1415,7 +1427,7 @@ async def get_my_entitlement(current_user: CurrentUser = Depends(get_current_use
     expires_ms = data.get("expiresDateMs")
     
     # Simple check
-    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    now_ms = time.time_ns() // 1_000_000
     is_expired = False
     if expires_ms and expires_ms <= now_ms:
         is_expired = True
@@ -1537,7 +1549,7 @@ def _is_active(transaction_info: dict) -> bool:
         # 期限がない場合は有効とみなす（例: ライフタイム）
         return True
     
-    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    now_ms = time.time_ns() // 1_000_000
     return int(expires_date_ms) > now_ms
 
 
@@ -1606,9 +1618,11 @@ async def claim_apple_subscription(
         logger.warning(f"AppAccountToken mismatch for user {current_user.uid}. Expected {expected_token}, got {tx_app_token}. Proceeding with ownership check.")
 
     # 3. Transactional Claim
+    claimed_phone = None
     try:
         @firestore.transactional
         def claim_in_transaction(transaction):
+            nonlocal claimed_phone
             now = datetime.now(timezone.utc)
             
             entitlement_id = f"apple:{otid}"
@@ -1650,6 +1664,7 @@ async def claim_apple_subscription(
                 phone = acc_doc.to_dict().get("phoneE164")
                 
                 if phone:
+                    claimed_phone = phone
                     phone_ref = db.collection("phone_numbers").document(phone)
                     phone_docs = list(transaction.get_all([phone_ref]))
                     phone_doc = phone_docs[0] if phone_docs else None
@@ -1742,6 +1757,7 @@ async def claim_apple_subscription(
         # Run Transaction
         transaction = db.transaction()
         final_data = claim_in_transaction(transaction)
+        invalidate_pointer_cache("phone_numbers", claimed_phone)
 
         is_active = final_data.get("status") in ["active", "active_lifetime"]
         expires_ms = None
@@ -2690,6 +2706,8 @@ async def link_phone_to_account(
     try:
         transaction = db.transaction()
         final_account_id = link_and_merge(transaction)
+        invalidate_pointer_cache("phone_numbers", phone)
+        invalidate_canonical_cache(uid)
     except Exception as e:
         logger.error(f"[users/me/phone:link] Failed: {e}")
         raise HTTPException(500, f"Failed to link phone: {str(e)}")
@@ -1,5 +1,9 @@
 import os
+import time
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
 
 from appstoreserverlibrary.api_client import AppStoreServerAPIClient, Environment as ClientEnvironment
@@ -27,8 +31,50 @@ def _load_root_certificates(cert_dir: str) -> List[bytes]:
         logger.error("No Apple root certificates loaded from %s", cert_dir)
     return certs
 
+# [PERF] Apple re-delivers identical signed payloads (notification retries, repeat
+# /ios/confirm calls). Successful verifications are memoized by payload digest so a
+# replay skips the ECDSA + x5c chain validation. Failures are never cached, and the
+# TTL keeps revocation/expiry checks from being skipped for long.
+_VERIFY_CACHE_MAX_SIZE = 4096
+_VERIFY_CACHE_TTL = 600
+
+
+class _VerifiedPayloadCache:
+    def __init__(self, max_size: int = _VERIFY_CACHE_MAX_SIZE, ttl: float = _VERIFY_CACHE_TTL):
+        self._entries: "OrderedDict[tuple[str, bytes], tuple[Any, float]]" = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, signed_payload: str) -> tuple[str, bytes]:
+        return kind, hashlib.sha256(signed_payload.encode("utf-8")).digest()
+
+    def get(self, kind: str, signed_payload: str) -> Optional[Any]:
+        key = self._key(kind, signed_payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expire_at = entry
+            if time.monotonic() > expire_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, kind: str, signed_payload: str, value: Any) -> None:
+        key = self._key(kind, signed_payload)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+
 class AppStoreService:
     def __init__(self):
+        self._verified = _VerifiedPayloadCache()
         self.issuer_id = os.getenv("APPLE_ISSUER_ID")
         self.key_id = os.getenv("APPLE_KEY_ID")
         self.private_key = os.getenv("APPLE_KEY_P8")
@@ -141,10 +187,15 @@ class AppStoreService:
                 "error_message": "AppStoreService verifier not initialized.",
             }
 
+        cached = self._verified.get("transaction", signed_payload)
+        if cached is not None:
+            return dict(cached), None
+
         # Try with primary verifier first
         try:
             result = self._decode_transaction(self.verifier, signed_payload)
             print(f"[Apple] Decoded (primary): otid={result.get('originalTransactionId')}, productId={result.get('productId')}, env={result.get('environment')}")
+            self._verified.put("transaction", signed_payload, dict(result))
             return result, None
         except Exception as primary_error:
             primary_error_msg = str(primary_error)
@@ -157,6 +208,7 @@ class AppStoreService:
                         result = self._decode_transaction(alternate_verifier, signed_payload)
                         alt_env = "sandbox" if alternate_verifier == self.verifier_sandbox else "production"
                         print(f"[Apple] Decoded (fallback {alt_env}): otid={result.get('originalTransactionId')}, productId={result.get('productId')}, env={result.get('environment')}")
+                        self._verified.put("transaction", signed_payload, dict(result))
                         return result, None
                     except Exception as fallback_error:
                         # Both verifiers failed
@@ -192,9 +244,15 @@ class AppStoreService:
             logger.error("AppStoreService verifier not initialized.")
             return None
 
+        cached = self._verified.get("notification", signed_payload)
+        if cached is not None:
+            return cached
+
         # Try primary verifier first
         try:
-            return self.verifier.verify_and_decode_notification(signed_payload)
+            result = self.verifier.verify_and_decode_notification(signed_payload)
+            self._verified.put("notification", signed_payload, result)
+            return result
         except Exception as primary_error:
             primary_error_msg = str(primary_error)
             if "INVALID_ENVIRONMENT" in primary_error_msg:
@@ -205,6 +263,7 @@ class AppStoreService:
                         result = alternate_verifier.verify_and_decode_notification(signed_payload)
                         alt_env = "sandbox" if alternate_verifier == self.verifier_sandbox else "production"
                         logger.info(f"Notification verified with fallback verifier ({alt_env})")
+                        self._verified.put("notification", signed_payload, result)
                         return result
                     except Exception as fallback_error:
                         logger.error(f"Notification verification failed with both verifiers. Primary: {primary_error_msg}, Fallback: {fallback_error}")
@@ -221,9 +280,15 @@ class AppStoreService:
             logger.error("AppStoreService verifier not initialized.")
             return None
 
+        cached = self._verified.get("renewal_info", signed_payload)
+        if cached is not None:
+            return cached
+
         try:
             if hasattr(self.verifier, "verify_and_decode_renewal_info"):
-                return self.verifier.verify_and_decode_renewal_info(signed_payload)
+                result = self.verifier.verify_and_decode_renewal_info(signed_payload)
+                self._verified.put("renewal_info", signed_payload, result)
+                return result
             logger.warning("SignedDataVerifier lacks verify_and_decode_renewal_info; skipping decode.")
             return None
         except Exception as e:
@@ -965,6 +965,8 @@ async def _run_local_youtube_import(session_id: str, url: str, language: str):
         # Update DB
         doc_ref.update({
             "transcriptText": transcript,
+            "hasTranscript": bool(transcript),
+            "transcriptTextLen": len(transcript) if transcript else 0,
             "status": "録音済み",
             "audioPath": f"imports/{session_id}.flac" 
         })
@@ -1123,6 +1125,8 @@ async def _run_local_transcribe(session_id: str, force: bool = False, engine: st
         }
         if transcription_mode == "cloud_google" or not data.get("transcriptText"):
             updates["transcriptText"] = transcript_text
+            updates["hasTranscript"] = bool(transcript_text)
+            updates["transcriptTextLen"] = len(transcript_text) if transcript_text else 0
             if segments:
                 updates["segments"] = segments
 
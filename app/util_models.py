@@ -144,8 +144,8 @@ class JobStatusResponse(BaseModel):
     status: AsyncJobStatus
     stage: Optional[str] = None  # Current stage (queued, generating_tldr, etc.)
     createdAt: datetime
-    updatedAt: datetime
-    completedAt: Optional[datetime] = None
+    updatedAt: datetime  # Firestore server time (SERVER_TIMESTAMP on worker updates)
+    completedAt: Optional[datetime] = None  # Firestore server time
     resultUrl: Optional[str] = None
     errorReason: Optional[str] = None
     progress: Optional[float] = None  # 0.0 - 1.0
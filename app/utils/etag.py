@@ -0,0 +1,22 @@
+from typing import Optional
+
+
+def if_none_match_hits(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag (RFC 9110 weak comparison).
+
+    Accepts "*", comma-separated lists and W/-prefixed (weak) entity tags,
+    which proxies and CDNs commonly produce from the strong tags we send.
+    """
+    if not if_none_match:
+        return False
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
@@ -0,0 +1,42 @@
+"""Unit tests for the verified-payload memoization in app.services.apple."""
+from __future__ import annotations
+
+from app.services.apple import AppStoreService
+
+
+class _Verifier:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def verify_and_decode_notification(self, signed_payload):
+        self.calls += 1
+        if self.fail:
+            raise ValueError("bad signature")
+        return {"notificationUUID": signed_payload}
+
+
+def _service():
+    service = AppStoreService()
+    service.verifier = _Verifier()
+    return service
+
+
+def test_repeat_notification_payload_skips_verification():
+    service = _service()
+
+    first = service.verify_notification("payload-1")
+    second = service.verify_notification("payload-1")
+
+    assert first == second == {"notificationUUID": "payload-1"}
+    assert service.verifier.calls == 1
+
+
+def test_failed_verification_is_not_cached():
+    service = _service()
+    service.verifier.fail = True
+    assert service.verify_notification("payload-2") is None
+
+    service.verifier.fail = False
+    assert service.verify_notification("payload-2") == {"notificationUUID": "payload-2"}
+    assert service.verifier.calls == 2
@@ -0,0 +1,276 @@
+"""Unit tests for the session asset manifest (app.routes.assets.get_session_assets)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import Response
+
+from app.dependencies import CurrentUser
+from app.routes import assets
+from app.util_models import AssetStatus
+
+
+class _Snapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _DocRef:
+    def __init__(self, store, doc_id):
+        self._store = store
+        self.id = doc_id
+
+    def get(self, field_paths=None):
+        self._store.session_reads.append(field_paths)
+        data = self._store.session
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        return _Snapshot(self.id, data)
+
+
+class _Store:
+    def __init__(self):
+        self.session = None
+        self.session_reads = []
+
+    def get_all(self, refs):
+        return [_Snapshot(ref.id, None) for ref in refs]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    s = _Store()
+    monkeypatch.setattr(assets, "db", s)
+    monkeypatch.setattr(assets, "_session_doc_ref", lambda session_id: _DocRef(s, session_id))
+    monkeypatch.setattr(assets, "_derived_doc_ref", lambda session_id, kind: _DocRef(s, kind))
+    monkeypatch.setattr(assets, "ensure_can_view", lambda data, user, session_id: None)
+    return s
+
+
+def _manifest():
+    user = CurrentUser(uid="u1", account_id="acc1", provider="apple.com", phone_number=None, email=None)
+    return asyncio.run(assets.get_session_assets("s1", current_user=user))
+
+
+@pytest.mark.parametrize("fields", [
+    {"hasTranscript": True},
+    {"transcriptTextLen": 120},
+])
+def test_flagged_transcript_is_decided_from_one_projected_read(store, fields):
+    store.session = {"ownerUid": "u1", "transcriptText": "x" * 120, **fields}
+
+    manifest = _manifest()
+
+    assert manifest.transcript.status == AssetStatus.READY
+    assert store.session_reads == [assets._MANIFEST_FIELDS]
+
+
+def test_unflagged_session_falls_back_to_transcript_text(store):
+    store.session = {"ownerUid": "u1", "transcriptText": "legacy transcript"}
+
+    manifest = _manifest()
+
+    assert manifest.transcript.status == AssetStatus.READY
+    assert store.session_reads == [assets._MANIFEST_FIELDS, ["transcriptText"]]
+
+
+def test_session_without_transcript_is_pending(store):
+    store.session = {"ownerUid": "u1", "transcriptionStatus": "running"}
+
+    manifest = _manifest()
+
+    assert manifest.transcript.status == AssetStatus.PENDING
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Generation trigger (assets.ensure_asset_generation)
+# ──────────────────────────────────────────────────────────────────────
+
+class _DerivedRef:
+    def __init__(self, data):
+        self._data = data
+
+    def get(self):
+        return _Snapshot("summary", self._data)
+
+
+@pytest.fixture
+def enqueued(store, monkeypatch):
+    calls = []
+    monkeypatch.setattr(assets, "ensure_is_owner", lambda data, user, session_id: None)
+    monkeypatch.setattr(assets, "enqueue_summarize_task", lambda *args, **kwargs: calls.append(args))
+    return calls
+
+
+def _ensure_summary(derived, monkeypatch):
+    monkeypatch.setattr(assets, "_derived_doc_ref", lambda session_id, kind: _DerivedRef(derived))
+    user = CurrentUser(uid="u1", account_id="acc1", provider="apple.com", phone_number=None, email=None)
+    return asyncio.run(assets.ensure_asset_generation("s1", "summary", current_user=user))
+
+
+def test_ensure_falls_back_to_session_fields_when_derived_doc_is_empty(store, enqueued, monkeypatch):
+    store.session = {"ownerUid": "u1", "summaryStatus": "completed", "summaryMarkdown": "# notes"}
+
+    res = _ensure_summary({}, monkeypatch)
+
+    assert res == {"status": "skipped", "current": AssetStatus.READY}
+    assert enqueued == []
+
+
+def test_ensure_enqueues_when_neither_derived_doc_nor_session_has_content(store, enqueued, monkeypatch):
+    store.session = {"ownerUid": "u1"}
+
+    res = _ensure_summary({}, monkeypatch)
+
+    assert res["status"] == "enqueued"
+    assert enqueued == [("s1",)]
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Transcript artifact (assets.get_artifact_transcript)
+# ──────────────────────────────────────────────────────────────────────
+
+def _transcript(if_none_match=None, response=None):
+    user = CurrentUser(uid="u1", account_id="acc1", provider="apple.com", phone_number=None, email=None)
+    return asyncio.run(assets.get_artifact_transcript(
+        "s1", response=response or Response(), current_user=user, if_none_match=if_none_match,
+    ))
+
+
+def test_transcript_artifact_returns_model_with_etag(store):
+    store.session = {"ownerUid": "u1", "transcriptText": "こんにちは \"quoted\""}
+    response = Response()
+
+    res = _transcript(response=response)
+
+    assert res.status == "completed"
+    assert res.result == {"transcript": "こんにちは \"quoted\""}
+    assert response.headers["ETag"].startswith('"')
+
+
+@pytest.mark.parametrize("header", [
+    "{etag}",
+    "W/{etag}",
+    '"other", {etag}',
+    '"other",W/{etag}',
+    "*",
+])
+def test_transcript_artifact_revalidates_weak_and_listed_etags(store, header):
+    store.session = {"ownerUid": "u1", "transcriptText": "hello"}
+    first = Response()
+    _transcript(response=first)
+
+    res = _transcript(if_none_match=header.format(etag=first.headers["ETag"]))
+
+    assert res.status_code == 304
+
+
+def test_transcript_artifact_changed_text_misses_etag(store):
+    store.session = {"ownerUid": "u1", "transcriptText": "hello"}
+    first = Response()
+    _transcript(response=first)
+    store.session = {"ownerUid": "u1", "transcriptText": "hello again"}
+
+    res = _transcript(if_none_match=f'W/{first.headers["ETag"]}')
+
+    assert res.status == "completed"
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Limit cleanup wipe (tasks.handle_cleanup_sessions_task)
+# ──────────────────────────────────────────────────────────────────────
+
+class _CleanupDocRef:
+    def __init__(self, docs, path):
+        self._docs = docs
+        self.path = path
+
+    def update(self, data):
+        self._docs[self.path] = {**self._docs.get(self.path, {}), **data}
+
+
+class _CleanupQuery:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def stream(self):
+        return [
+            type("Doc", (), {"id": path.split("/", 1)[1], "to_dict": lambda self, d=data: dict(d)})()
+            for path, data in self._docs.items()
+            if path.startswith("sessions/")
+        ]
+
+
+class _CleanupCollection:
+    def __init__(self, docs, name):
+        self._docs = docs
+        self._name = name
+
+    def where(self, *args):
+        return _CleanupQuery(self._docs)
+
+    def document(self, doc_id):
+        return _CleanupDocRef(self._docs, f"{self._name}/{doc_id}")
+
+
+class _CleanupBatch:
+    def __init__(self):
+        self._ops = []
+
+    def update(self, ref, data):
+        self._ops.append((ref, data))
+
+    def commit(self):
+        for ref, data in self._ops:
+            ref.update(data)
+
+
+class _CleanupClient:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def collection(self, name):
+        return _CleanupCollection(self._docs, name)
+
+    def batch(self):
+        return _CleanupBatch()
+
+
+def test_limit_cleanup_wipe_clears_transcript_flags(store, monkeypatch):
+    from datetime import datetime, timezone
+
+    from google.cloud import firestore as cloud_firestore
+
+    from app.routes import tasks
+
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    docs = {
+        f"sessions/s{i}": {
+            "ownerUid": "u1",
+            "createdAt": old,
+            "updatedAt": old.replace(day=1 + i % 28),
+            "transcriptText": "hello",
+            "hasTranscript": True,
+            "transcriptTextLen": 5,
+        }
+        for i in range(301)
+    }
+    docs["sessions/s0"]["updatedAt"] = datetime(2019, 1, 1, tzinfo=timezone.utc)
+    # handle_cleanup_sessions_task builds its own client from this module
+    monkeypatch.setattr(cloud_firestore, "Client", lambda project=None: _CleanupClient(docs))
+
+    class _Request:
+        async def json(self):
+            return {"userId": "u1"}
+
+    asyncio.run(tasks.handle_cleanup_sessions_task(_Request()))
+
+    store.session = docs["sessions/s0"]
+    assert store.session["status"] == "deleted_by_limit_cleanup"
+    assert _manifest().transcript.status == AssetStatus.PENDING
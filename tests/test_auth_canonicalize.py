@@ -0,0 +1,490 @@
+"""Unit tests for /auth/canonicalize (app.routes.auth.canonicalize_user).
+
+Uses an in-memory replacement for `db` so the resolution priority and the
+merge writes can be exercised without Firestore.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from typing import Any, Dict
+
+import pytest
+
+from fastapi import Response
+
+from app.dependencies import CurrentUser
+from app.routes import auth
+
+
+# ──────────────────────────────────────────────────────────────────────
+# In-memory Firestore stand-in
+# ──────────────────────────────────────────────────────────────────────
+
+class _NotFound(Exception):
+    pass
+
+
+class _ArrayUnion:
+    def __init__(self, values):
+        self.values = list(values)
+
+
+class _ArrayRemove:
+    def __init__(self, values):
+        self.values = list(values)
+
+
+class _FirestoreModule:
+    ArrayUnion = _ArrayUnion
+    ArrayRemove = _ArrayRemove
+    SERVER_TIMESTAMP = object()
+
+
+class _Snapshot:
+    def __init__(self, ref: "_DocRef"):
+        self.id = ref.id
+        self.reference = ref
+        self._data = ref._store._docs.get(ref._key)
+        self.exists = self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _DocRef:
+    def __init__(self, store, collection, doc_id):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+    @property
+    def _key(self):
+        return (self._collection, self.id)
+
+    @property
+    def path(self):
+        return f"{self._collection}/{self.id}"
+
+    @property
+    def parent(self):
+        return _Collection(self._store, self._collection)
+
+    def get(self, transaction=None, field_paths=None):
+        self._store.reads += 1
+        return _Snapshot(self)
+
+    def _apply(self, data: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+        out = dict(base)
+        for key, value in data.items():
+            if isinstance(value, _ArrayUnion):
+                current = list(out.get(key) or [])
+                out[key] = current + [v for v in value.values if v not in current]
+            elif isinstance(value, _ArrayRemove):
+                out[key] = [v for v in (out.get(key) or []) if v not in value.values]
+            else:
+                out[key] = value
+        return out
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        self._store.writes += 1
+        base = self._store._docs.get(self._key, {}) if merge else {}
+        self._store._docs[self._key] = self._apply(data, base)
+
+    def update(self, data: Dict[str, Any]):
+        if self._key not in self._store._docs:
+            raise _NotFound(self.path)
+        self._store.writes += 1
+        self._store._docs[self._key] = self._apply(data, self._store._docs[self._key])
+
+
+class _Batch:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+        self._update_refs = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self._update_refs.append(ref)
+        self._ops.append(lambda: ref.update(data))
+
+    def commit(self):
+        # Atomic like Firestore: validate every update target before applying anything
+        for ref in self._update_refs:
+            if ref._key not in self._store._docs:
+                raise _NotFound(ref.path)
+        self._store.commits += 1
+        for op in self._ops:
+            op()
+
+
+class _Collection:
+    _ids = itertools.count(1)
+
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+        self.id = name
+
+    def document(self, doc_id=None):
+        return _DocRef(self._store, self._name, doc_id or f"auto{next(self._ids)}")
+
+
+class _DB:
+    def __init__(self):
+        self._docs = {}
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+    def batch(self):
+        return _Batch(self)
+
+    def get_all(self, refs):
+        self.reads += len(refs)
+        return [_Snapshot(ref) for ref in reversed(refs)]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    store = _DB()
+    monkeypatch.setattr(auth, "db", store)
+    monkeypatch.setattr(auth, "firestore", _FirestoreModule)
+    monkeypatch.setattr(auth, "NotFound", _NotFound)
+    monkeypatch.setattr(auth, "_CANONICAL_CACHE", {})
+    monkeypatch.setattr(auth, "_POINTER_CACHE", {})
+    monkeypatch.setattr(auth, "_cache_set_account_id", lambda uid, account_id: None)
+    return store
+
+
+def _user(uid="u1", phone=None):
+    return CurrentUser(uid=uid, account_id="ignored", provider="apple.com", phone_number=phone, email=None)
+
+
+def _canonicalize(user, if_none_match=None, response=None):
+    return asyncio.run(auth.canonicalize_user(
+        response=response or Response(), current_user=user, if_none_match=if_none_match,
+    ))
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Tests
+# ──────────────────────────────────────────────────────────────────────
+
+def test_already_linked_returns_not_canonicalized(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "standard", "memberUids": ["u1"]}
+
+    res = _canonicalize(_user())
+
+    assert res.canonicalized is False
+    assert res.accountId == "acc1"
+    assert res.plan == "standard"
+
+
+def test_app_token_wins_over_phone(fake_db):
+    fake_db._docs[("users", "u1")] = {"appleAppAccountToken": "tok"}
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("apple_app_account_tokens", "tok")] = {"accountId": "by_token"}
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_token")] = {"plan": "free", "memberUids": ["other"]}
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1"]}
+
+    res = _canonicalize(_user(phone="+81900"))
+
+    assert res.canonicalized is True
+    assert res.accountId == "by_token"
+    assert fake_db._docs[("uid_links", "u1")]["accountId"] == "by_token"
+    assert fake_db._docs[("users", "u1")]["accountId"] == "by_token"
+    assert sorted(fake_db._docs[("accounts", "by_token")]["memberUids"]) == ["other", "u1"]
+    assert fake_db._docs[("accounts", "old")]["mergedInto"] == "by_token"
+    assert fake_db.commits == 1
+
+
+def test_phone_lookup_merges_into_phone_account(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_phone")] = {"plan": "premium", "memberUids": ["other"]}
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1"]}
+
+    res = _canonicalize(_user(phone="+81900"))
+
+    assert res.accountId == "by_phone"
+    assert res.plan == "premium"
+
+
+def test_unknown_user_gets_new_account(fake_db):
+    res = _canonicalize(_user())
+
+    assert res.canonicalized is True
+    link = fake_db._docs[("uid_links", "u1")]
+    assert link["accountId"] == res.accountId
+    assert fake_db._docs[("accounts", res.accountId)]["primaryUid"] == "u1"
+
+
+def test_merge_creates_missing_target_account(fake_db):
+    fake_db._docs[("users", "u1")] = {"appleAppAccountToken": "tok"}
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("apple_app_account_tokens", "tok")] = {"accountId": "fresh"}
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1", "u2"]}
+
+    res = _canonicalize(_user())
+
+    assert res.accountId == "fresh"
+    target = fake_db._docs[("accounts", "fresh")]
+    assert target["memberUids"] == ["u1"]
+    assert target["primaryUid"] == "u1"
+    assert fake_db._docs[("accounts", "old")]["memberUids"] == ["u2"]
+
+
+def test_merge_keeps_existing_target_plan(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "paid"}
+    fake_db._docs[("accounts", "paid")] = {"plan": "premium", "primaryUid": "p", "memberUids": ["p"]}
+
+    _canonicalize(_user(phone="+81900"))
+
+    target = fake_db._docs[("accounts", "paid")]
+    assert target["plan"] == "premium"
+    assert target["primaryUid"] == "p"
+    assert target["memberUids"] == ["p", "u1"]
+
+
+def test_merge_keeps_source_account_with_remaining_members(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_phone")] = {"plan": "free", "memberUids": ["p"]}
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1", "u2"]}
+
+    _canonicalize(_user(phone="+81900"))
+
+    source = fake_db._docs[("accounts", "old")]
+    assert source["memberUids"] == ["u2"]
+    assert "mergedInto" not in source
+
+
+def test_merge_tolerates_missing_source_account(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "gone"}
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_phone")] = {"plan": "free", "memberUids": ["p"]}
+
+    res = _canonicalize(_user(phone="+81900"))
+
+    assert res.accountId == "by_phone"
+    assert ("accounts", "gone") not in fake_db._docs
+    assert fake_db._docs[("accounts", "by_phone")]["memberUids"] == ["p", "u1"]
+
+
+def test_failed_merge_commit_leaves_account_id_cache_alone(fake_db, monkeypatch):
+    cached = {}
+    monkeypatch.setattr(auth, "_cache_set_account_id", lambda uid, account_id: cached.update({uid: account_id}))
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1"]}
+
+    def _failing_commit():
+        raise RuntimeError("commit failed")
+
+    def _failing_batch():
+        batch = _Batch(fake_db)
+        batch.commit = _failing_commit
+        return batch
+
+    monkeypatch.setattr(fake_db, "batch", _failing_batch)
+
+    with pytest.raises(RuntimeError):
+        auth._merge_uid_into_account_sync("u1", "new", "old")
+
+    assert cached == {}
+
+
+def test_merge_refreshes_caches_after_commit(fake_db, monkeypatch):
+    cached = {}
+    monkeypatch.setattr(auth, "_cache_set_account_id", lambda uid, account_id: cached.update({uid: account_id}))
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1"]}
+    fake_db._docs[("accounts", "new")] = {"plan": "free", "memberUids": ["p"]}
+    make_batch = fake_db.batch
+
+    def _racing_batch():
+        batch = make_batch()
+        commit = batch.commit
+
+        def _commit():
+            # A concurrent canonicalize caches the pre-merge account mid-commit
+            auth._CANONICAL_CACHE["u1"] = ("old", None, float("inf"))
+            assert cached == {}
+            commit()
+
+        batch.commit = _commit
+        return batch
+
+    monkeypatch.setattr(fake_db, "batch", _racing_batch)
+
+    auth._merge_uid_into_account_sync("u1", "new", "old")
+
+    assert cached == {"u1": "new"}
+    assert "u1" not in auth._CANONICAL_CACHE
+
+
+def test_unchanged_identity_returns_304_without_resolution(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "standard", "memberUids": ["u1"]}
+
+    first = Response()
+    _canonicalize(_user(), response=first)
+    etag = first.headers["ETag"]
+    reads, writes = fake_db.reads, fake_db.writes
+
+    res = _canonicalize(_user(), if_none_match=etag)
+
+    assert res.status_code == 304
+    assert fake_db.reads - reads == 2  # users + accounts only
+    assert fake_db.writes == writes
+
+
+def test_weak_etag_in_list_returns_304(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "standard", "memberUids": ["u1"]}
+
+    first = Response()
+    _canonicalize(_user(), response=first)
+
+    res = _canonicalize(_user(), if_none_match=f'"stale", W/{first.headers["ETag"]}')
+
+    assert res.status_code == 304
+
+
+def test_matching_etag_returns_304_after_cache_expiry(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "standard", "memberUids": ["u1"]}
+
+    first = Response()
+    _canonicalize(_user(), response=first)
+    auth.invalidate_canonical_cache("u1")
+
+    res = _canonicalize(_user(), if_none_match=first.headers["ETag"])
+
+    assert res.status_code == 304
+    assert res.headers["ETag"] == first.headers["ETag"]
+
+
+def test_repeat_call_is_served_from_cache(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "standard", "memberUids": ["u1"]}
+
+    first = _canonicalize(_user())
+    reads, writes = fake_db.reads, fake_db.writes
+    second = _canonicalize(_user())
+
+    assert json.loads(second.body) == first.model_dump()
+    assert second.media_type == "application/json"
+    assert fake_db.reads - reads == 2
+    assert fake_db.writes == writes
+
+
+def test_cached_identity_reflects_plan_and_profile_changes(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "free", "memberUids": ["u1"]}
+    first = Response()
+    _canonicalize(_user(), response=first)
+
+    fake_db._docs[("accounts", "acc1")]["plan"] = "basic"
+    fake_db._docs[("users", "u1")]["username"] = "taro"
+    res = _canonicalize(_user(), if_none_match=first.headers["ETag"])
+
+    assert res.status_code == 200
+    assert json.loads(res.body)["plan"] == "basic"
+    assert json.loads(res.body)["username"] == "taro"
+    assert res.headers["ETag"] != first.headers["ETag"]
+
+
+def test_cache_is_bypassed_when_phone_claim_changes(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "free", "memberUids": ["u1"]}
+    _canonicalize(_user())
+
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_phone")] = {"plan": "premium", "memberUids": ["p"]}
+    res = _canonicalize(_user(phone="+81900"))
+
+    assert res.accountId == "by_phone"
+    assert res.canonicalized is True
+    assert "u1" not in auth._CANONICAL_CACHE
+
+
+def test_concurrent_calls_share_one_resolution(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_phone")] = {"plan": "free", "memberUids": ["p"]}
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1"]}
+
+    async def _both():
+        user = _user(phone="+81900")
+        return await asyncio.gather(
+            auth.canonicalize_user(response=Response(), current_user=user, if_none_match=None),
+            auth.canonicalize_user(response=Response(), current_user=user, if_none_match=None),
+        )
+
+    first, second = asyncio.run(_both())
+
+    assert first is second
+    assert fake_db.commits == 1
+    assert auth._CANONICALIZE_INFLIGHT == {}
+
+
+def test_pointer_lookups_are_cached_including_misses(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "acc1"}
+    fake_db._docs[("accounts", "acc1")] = {"plan": "free", "memberUids": ["u1"]}
+
+    _canonicalize(_user(phone="+81900"))
+    assert auth._POINTER_CACHE[("phone_numbers", "+81900")][0] is None
+
+    # Cached miss: the pointer doc is not re-read even after the response cache is dropped
+    auth.invalidate_canonical_cache("u1")
+    reads = fake_db.reads
+    _canonicalize(_user(phone="+81900"))
+    assert fake_db.reads - reads == 3  # users + uid_links + accounts, no phone_numbers
+
+
+def test_invalidated_pointer_is_read_again(fake_db):
+    fake_db._docs[("uid_links", "u1")] = {"accountId": "old"}
+    fake_db._docs[("accounts", "old")] = {"plan": "free", "memberUids": ["u1"]}
+    _canonicalize(_user(phone="+81900"))
+
+    fake_db._docs[("phone_numbers", "+81900")] = {"accountId": "by_phone"}
+    fake_db._docs[("accounts", "by_phone")] = {"plan": "free", "memberUids": ["p"]}
+    auth.invalidate_pointer_cache("phone_numbers", "+81900")
+    auth.invalidate_canonical_cache("u1")
+
+    assert _canonicalize(_user(phone="+81900")).accountId == "by_phone"
+
+
+def test_failure_after_caller_cancel_is_retrieved(fake_db, monkeypatch):
+    import gc
+
+    async def _failing(current_user):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(auth, "_canonicalize_uncached", _failing)
+    unhandled = []
+
+    async def _run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: unhandled.append(ctx))
+        caller = asyncio.ensure_future(
+            auth.canonicalize_user(response=Response(), current_user=_user(), if_none_match=None)
+        )
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        gc.collect()
+
+    asyncio.run(_run())
+
+    assert unhandled == []
+    assert auth._CANONICALIZE_INFLIGHT == {}
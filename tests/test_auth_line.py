@@ -0,0 +1,53 @@
+"""Unit tests for local LINE ID token verification in app.routes.auth."""
+from __future__ import annotations
+
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.routes import auth
+
+
+class _JWKSClient:
+    def __init__(self, key=None):
+        self.key = key
+        self.calls = []
+
+    def get_signing_key(self, kid):
+        self.calls.append(kid)
+        if self.key is None:
+            raise jwt.PyJWKClientError(f"Unable to find a signing key that matches: {kid}")
+        return type("SigningKey", (), {"key": self.key})()
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    client = _JWKSClient()
+    monkeypatch.setattr(auth, "_line_jwks_client", client)
+    return client
+
+
+def _claims(**extra):
+    now = int(time.time())
+    return {"iss": auth.LINE_ISSUER, "aud": "chan", "sub": "U1", "iat": now, "exp": now + 60, **extra}
+
+
+def test_hs256_token_skips_jwks(jwks):
+    token = jwt.encode(_claims(), "channel-secret-of-at-least-32-bytes!", algorithm="HS256")
+
+    assert auth._verify_line_id_token_locally(token, "chan", None) is None
+    assert jwks.calls == []
+
+
+def test_es256_token_verifies_against_jwks_key(jwks):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    jwks.key = private_key.public_key()
+    token = jwt.encode(_claims(nonce="n1"), private_key, algorithm="ES256", headers={"kid": "k1"})
+
+    claims = auth._verify_line_id_token_locally(token, "chan", "n1")
+
+    assert claims["sub"] == "U1"
+    assert jwks.calls == ["k1"]
+    assert auth._verify_line_id_token_locally(token, "chan", "other") is None
@@ -0,0 +1,398 @@
+"""Unit tests for the App Store purchase paths in app.routes.billing.
+
+Uses an in-memory replacement for `db` and a stub `apple_service` so the
+confirm / notification write paths can be exercised without Firestore or
+Apple's verifier.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict
+
+import pytest
+from fastapi import HTTPException
+
+from app import dependencies
+from app.dependencies import CurrentUser
+from app.routes import billing
+from app.util_models import AppStoreNotificationRequest, BillingConfirmRequest
+
+
+# ──────────────────────────────────────────────────────────────────────
+# In-memory Firestore stand-in
+# ──────────────────────────────────────────────────────────────────────
+
+class _NotFound(Exception):
+    pass
+
+
+class _FirestoreModule:
+    SERVER_TIMESTAMP = "SERVER_TIMESTAMP"
+
+    @staticmethod
+    def transactional(fn):
+        def run(transaction, *args, **kwargs):
+            result = fn(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+        return run
+
+
+class _Snapshot:
+    def __init__(self, ref: "_DocRef"):
+        self.id = ref.id
+        self.reference = ref
+        self._data = ref._store._docs.get(ref.path)
+        self.exists = self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _DocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return _Collection(self._store, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        self._store.reads += 1
+        return _Snapshot(self)
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        self._store.writes += 1
+        base = self._store._docs.get(self.path, {}) if merge else {}
+        self._store._docs[self.path] = {**base, **data}
+
+    def update(self, data: Dict[str, Any]):
+        if self.path not in self._store._docs:
+            raise _NotFound(self.path)
+        self._store.writes += 1
+        self._store._docs[self.path] = {**self._store._docs[self.path], **data}
+
+
+class _Batch:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self._ops.append(lambda: ref.update(data))
+
+    def commit(self):
+        self._store.commits += 1
+        for op in self._ops:
+            op()
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return _DocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class _DB:
+    def __init__(self):
+        self._docs = {}
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.get_all_calls = 0
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+    def batch(self):
+        return _Batch(self)
+
+    def transaction(self):
+        return _Batch(self)
+
+    def get_all(self, refs, field_paths=None, transaction=None):
+        self.get_all_calls += 1
+        self.field_paths = field_paths
+        return [ref.get() for ref in refs]
+
+
+class _AppleService:
+    verifier = object()
+    bundle_id = "com.example.app"
+    environment = None
+
+    def __init__(self, transaction_info):
+        self._transaction_info = transaction_info
+
+    def verify_jws_detailed(self, signed_payload):
+        return self._transaction_info, None
+
+    def verify_jws(self, signed_payload):
+        return self._transaction_info
+
+    def verify_renewal_info(self, signed_payload):
+        return None
+
+    def get_subscription_status_for_account(self, original_transaction_id, expected_app_account_token=None):
+        return {
+            "found": True,
+            "status": "active",
+            "active": True,
+            "expires_date": 4102444800000,
+            "product_id": "cn_standard_monthly",
+            "app_account_token": expected_app_account_token,
+        }
+
+    def verify_notification(self, signed_payload):
+        return {
+            "notificationType": "DID_RENEW",
+            "subtype": None,
+            "notificationUUID": None,
+            "data": {"signedTransactionInfo": "txn"},
+        }
+
+
+_TRANSACTION = {
+    "bundleId": "com.example.app",
+    "environment": "Production",
+    "productId": "cn_standard_monthly",
+    "transactionId": "t2",
+    "originalTransactionId": "ot1",
+    "expiresDate": 4102444800000,
+    "appAccountToken": "tok",
+}
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    store = _DB()
+    monkeypatch.setattr(billing, "db", store)
+    monkeypatch.setattr(billing, "firestore", _FirestoreModule)
+    monkeypatch.setattr(billing, "apple_service", _AppleService(dict(_TRANSACTION)))
+    monkeypatch.setattr(billing, "is_feature_enabled", lambda name: True)
+    monkeypatch.setattr(dependencies, "_ACCOUNT_ID_CACHE", {})
+    monkeypatch.setattr(billing, "_UID_POINTER_CACHE", {})
+    store._docs["users/u1"] = {"plan": "free"}
+    store._docs["uid_links/u1"] = {"accountId": "acc1"}
+    return store
+
+
+def _user(uid="u1"):
+    return CurrentUser(uid=uid, account_id="acc1", provider="apple.com", phone_number=None, email=None)
+
+
+def _confirm():
+    req = BillingConfirmRequest(signedTransaction="jws")
+    return asyncio.run(billing.confirm_ios_purchase(req=req, current_user=_user(), response=None))
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Tests
+# ──────────────────────────────────────────────────────────────────────
+
+def test_confirm_commits_all_writes_in_one_transaction(fake_db):
+    res = _confirm()
+
+    assert res.ok is True
+    assert fake_db.get_all_calls == 1
+    assert fake_db.commits == 1
+    assert fake_db._docs["apple_app_account_tokens/tok"]["uid"] == "u1"
+    assert fake_db._docs["apple_transactions/ot1"]["uid"] == "u1"
+    assert fake_db._docs["users/u1/subscriptions/apple"]["originalTransactionId"] == "ot1"
+    assert fake_db._docs["users/u1"]["appleEntitlementId"] == "apple:ot1"
+    assert fake_db._docs["accounts/acc1"]["originalTransactionId"] == "ot1"
+    assert fake_db._docs["entitlements/apple:ot1"]["ownerAccountId"] == "acc1"
+    expires_at = billing._ms_to_datetime(_TRANSACTION["expiresDate"])
+    assert fake_db._docs["accounts/acc1"]["planExpiresAt"] == expires_at
+    assert fake_db._docs["entitlements/apple:ot1"]["currentPeriodEnd"] == expires_at
+
+
+def test_confirm_ownership_conflict_writes_nothing(fake_db):
+    fake_db._docs["entitlements/apple:ot1"] = {"ownerAccountId": "someone_else"}
+    before = dict(fake_db._docs)
+
+    with pytest.raises(HTTPException) as excinfo:
+        _confirm()
+
+    assert excinfo.value.status_code == 409
+    assert fake_db.commits == 0
+    assert fake_db._docs == before
+
+
+def test_confirm_token_conflict_writes_nothing(fake_db):
+    fake_db._docs["apple_app_account_tokens/tok"] = {"uid": "other"}
+    before = dict(fake_db._docs)
+
+    with pytest.raises(HTTPException) as excinfo:
+        _confirm()
+
+    assert excinfo.value.status_code == 409
+    assert fake_db.commits == 0
+    assert fake_db._docs == before
+
+
+def test_notification_commits_all_writes_in_one_batch(fake_db):
+    fake_db._docs["apple_app_account_tokens/tok"] = {"uid": "u1"}
+
+    res = asyncio.run(billing.handle_app_store_notifications(
+        AppStoreNotificationRequest(signedPayload="payload")
+    ))
+
+    assert res == {"status": "ok"}
+    assert fake_db.commits == 1
+    assert fake_db._docs["accounts/acc1"]["plan"] == fake_db._docs["users/u1"]["plan"]
+    assert fake_db._docs["entitlements/apple:ot1"]["ownerUserId"] == "u1"
+
+
+def test_notification_persists_entitlement_when_user_doc_is_missing(fake_db):
+    fake_db._docs["apple_app_account_tokens/tok"] = {"uid": "u1"}
+    del fake_db._docs["users/u1"]
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(billing.handle_app_store_notifications(
+            AppStoreNotificationRequest(signedPayload="payload")
+        ))
+
+    assert excinfo.value.status_code == 500
+    assert fake_db.commits == 1
+    assert fake_db._docs["entitlements/apple:ot1"]["ownerUserId"] == "u1"
+    assert fake_db._docs["accounts/acc1"]["plan"] == "basic"
+    assert "users/u1" not in fake_db._docs
+
+
+def test_confirm_ignores_stale_account_id_from_token_claims(fake_db):
+    dependencies._cache_set_account_id("u1", "acc_stale")
+
+    _confirm()
+
+    assert "accounts/acc_stale" not in fake_db._docs
+    assert fake_db._docs["accounts/acc1"]["originalTransactionId"] == "ot1"
+    assert fake_db._docs["entitlements/apple:ot1"]["ownerAccountId"] == "acc1"
+
+
+def test_notification_ignores_stale_account_id_from_token_claims(fake_db):
+    fake_db._docs["apple_app_account_tokens/tok"] = {"uid": "u1"}
+    dependencies._cache_set_account_id("u1", "acc_stale")
+
+    asyncio.run(billing.handle_app_store_notifications(
+        AppStoreNotificationRequest(signedPayload="payload")
+    ))
+
+    assert "accounts/acc_stale" not in fake_db._docs
+    assert fake_db._docs["accounts/acc1"]["plan"] == "basic"
+
+
+def test_notification_resolves_uid_from_confirmed_token_without_reading(fake_db):
+    _confirm()
+    del fake_db._docs["apple_app_account_tokens/tok"]
+    del fake_db._docs["apple_transactions/ot1"]
+
+    asyncio.run(billing.handle_app_store_notifications(
+        AppStoreNotificationRequest(signedPayload="payload")
+    ))
+
+    assert fake_db._docs["apple_transactions/ot1"]["uid"] == "u1"
+
+
+def test_lookup_uid_reads_both_pointers_in_one_call(fake_db):
+    fake_db._docs["apple_transactions/ot1"] = {"uid": "u_from_txn"}
+
+    assert billing._lookup_uid("tok", "ot1") == "u_from_txn"
+    assert fake_db.get_all_calls == 1
+    assert fake_db.field_paths == ["uid"]
+
+    # Both results (including the token miss) are cached
+    assert billing._lookup_uid("tok", "ot1") == "u_from_txn"
+    assert fake_db.get_all_calls == 1
+
+    fake_db._docs["apple_app_account_tokens/tok"] = {"uid": "u_from_token"}
+    billing.invalidate_uid_pointer_cache("apple_app_account_tokens", "tok")
+    assert billing._lookup_uid("tok", "ot1") == "u_from_token"
+    assert fake_db.get_all_calls == 2
+
+
+def test_entitlements_sync_commits_all_items_in_one_batch(fake_db):
+    req = billing.EntitlementsSyncRequest(items=[
+        {"productId": "cn_standard_monthly", "originalTransactionId": "ot1"},
+        {"productId": "cn_standard_monthly", "originalTransactionId": "ot2"},
+    ])
+
+    res = asyncio.run(billing.sync_ios_entitlements(req=req, current_user=_user(), response=None))
+
+    assert res.entitled is True
+    assert fake_db.commits == 1
+    assert fake_db._docs["apple_transactions/ot2"]["uid"] == "u1"
+    assert fake_db._docs["entitlements/apple:ot2"]["ownerAccountId"] == "acc1"
+    assert fake_db._docs["accounts/acc1"]["plan"] == fake_db._docs["users/u1"]["plan"] == "basic"
+
+
+def test_entitlements_sync_keeps_queued_writes_when_apple_call_fails(fake_db, monkeypatch):
+    real_status = billing.apple_service.get_subscription_status_for_account
+
+    def status_or_fail(original_transaction_id, expected_app_account_token=None):
+        if original_transaction_id == "ot2":
+            raise RuntimeError("apple unavailable")
+        return real_status(original_transaction_id, expected_app_account_token)
+
+    monkeypatch.setattr(billing.apple_service, "get_subscription_status_for_account", status_or_fail)
+    req = billing.EntitlementsSyncRequest(items=[
+        {"productId": "cn_standard_monthly", "originalTransactionId": "ot1"},
+        {"productId": "cn_standard_monthly", "originalTransactionId": "ot2"},
+    ])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(billing.sync_ios_entitlements(req=req, current_user=_user(), response=None))
+
+    assert fake_db.commits == 1
+    assert fake_db._docs["entitlements/apple:ot1"]["ownerAccountId"] == "acc1"
+    assert fake_db._docs["apple_transactions/ot2"]["uid"] == "u1"
+    assert billing._uid_pointer_cache_get("apple_transactions", "ot1") == "u1"
+
+
+def test_entitlements_sync_caches_pointers_only_after_commit(fake_db, monkeypatch):
+    def failing_commit(self):
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(_Batch, "commit", failing_commit)
+    req = billing.EntitlementsSyncRequest(items=[
+        {"productId": "cn_standard_monthly", "originalTransactionId": "ot1"},
+    ])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(billing.sync_ios_entitlements(req=req, current_user=_user(), response=None))
+
+    assert billing._UID_POINTER_CACHE == {}
+
+
+def test_extract_transaction_fields_matches_for_dict_and_object():
+    from types import SimpleNamespace
+
+    payload = {"bundleId": "b", "inAppOwnershipType": "PURCHASED", "expiresDate": "2000"}
+
+    from_dict = billing._extract_transaction_fields(payload)
+    from_obj = billing._extract_transaction_fields(SimpleNamespace(**payload))
+
+    assert from_dict == from_obj
+    assert from_dict["ownershipType"] == "PURCHASED"
+    assert from_dict["expiresDateMs"] == 2000
+    assert from_dict["purchaseDateMs"] is None and from_dict["purchaseAt"] is None
+
+
+def test_extract_renewal_fields_matches_for_dict_and_object():
+    from types import SimpleNamespace
+
+    payload = {"autoRenewStatus": 1, "gracePeriodExpiresDate": "5000", "isInBillingRetryPeriod": True}
+
+    from_dict = billing._extract_renewal_fields(payload)
+
+    assert from_dict == billing._extract_renewal_fields(SimpleNamespace(**payload))
+    assert from_dict["gracePeriodExpiresDateMs"] == 5000
+    assert from_dict["isInBillingRetryPeriod"] is True
+    assert from_dict["offerType"] is None
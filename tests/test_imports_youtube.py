@@ -0,0 +1,246 @@
+"""Unit tests for the YouTube import helpers in app.routes.imports."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.dependencies import CurrentUser
+from app.routes import imports, sessions
+from app.util_models import ImportYouTubeRequest, YouTubeCheckRequest
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("  dQw4w9WgXcQ  ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=10", "dQw4w9WgXcQ"),
+    ("youtube.com/watch?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://m.youtube.com/watch?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://youtu.be/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://youtu.be/dQw4w9WgXcQ?t=42", "dQw4w9WgXcQ"),
+    ("youtu.be/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/shorts/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/embed/dQw4w9WgXcQ?start=5", "dQw4w9WgXcQ"),
+    ("https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/v/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("see https://example.com/?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+])
+def test_parse_youtube_video_id(url, expected):
+    assert imports._parse_youtube_video_id(url) == expected
+
+
+@pytest.mark.parametrize("url", ["", "   ", None, "https://example.com/page", "abc"])
+def test_parse_youtube_video_id_rejects_invalid(url):
+    with pytest.raises(ValueError):
+        imports._parse_youtube_video_id(url)
+
+
+@pytest.mark.parametrize("url", [
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?list=PL1&v=dQw4w9WgXcQ#t=3",
+    "youtube.com/shorts/dQw4w9WgXcQ",
+])
+def test_fast_path_skips_urlparse(monkeypatch, url):
+    def _fail(*args, **kwargs):
+        raise AssertionError("urlparse should not be called")
+
+    monkeypatch.setattr(imports, "urlparse", _fail)
+    assert imports._parse_youtube_video_id(url) == "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=&v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ%20",
+    "https://www.youtube.com:443/watch?v=dQw4w9WgXcQ",
+    "HTTPS://YOUTU.BE/dQw4w9WgXcQ",
+    "https://youtu.be//dQw4w9WgXcQ",
+])
+def test_fast_path_defers_unusual_urls_to_full_parser(url):
+    assert imports._fast_parse_video_id(url) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("watch?v=dQw4w9WgXcQ&t=1", "dQw4w9WgXcQ"),
+    ("v=abc&v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("x/embed/short/shorts/dQw4w9WgXcQ/", "dQw4w9WgXcQ"),
+    ("shorts/aaaaaa v=bbbbbb", "aaaaaa"),
+    ("v=abc", None),
+    ("nothing here", None),
+])
+def test_scan_video_id(text, expected):
+    assert imports._scan_video_id(text) == expected
+
+
+class _TranscriptApi:
+    calls = 0
+    error = None
+
+    @classmethod
+    def list_transcripts(cls, video_id):
+        cls.calls += 1
+        if cls.error is not None:
+            raise cls.error
+        return [SimpleNamespace(language="Japanese", language_code="ja", is_generated=True, is_translatable=True)]
+
+
+@pytest.fixture
+def transcript_api(monkeypatch):
+    api = type("_Api", (_TranscriptApi,), {"calls": 0, "error": None})
+    monkeypatch.setattr(imports, "YouTubeTranscriptApi", api)
+    monkeypatch.setattr(imports, "_LIST_TRANSCRIPTS", api.list_transcripts)
+    monkeypatch.setattr(imports, "YT_TRANSCRIPT_AVAILABLE", True)
+    monkeypatch.setattr(imports, "_CHECK_CACHE", {})
+    return api
+
+
+def _check(url="https://youtu.be/dQw4w9WgXcQ"):
+    return asyncio.run(imports.check_youtube_transcript(YouTubeCheckRequest(url=url)))
+
+
+def test_check_caches_response_per_video(transcript_api):
+    first = _check()
+    second = _check("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+
+    assert first.available is True and second == first
+    assert transcript_api.calls == 1
+
+
+def test_check_does_not_cache_transient_failures(transcript_api):
+    transcript_api.error = RuntimeError("boom")
+
+    assert _check().reason == "internal_error"
+    assert _check().reason == "internal_error"
+    assert transcript_api.calls == 2
+
+
+class _Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _DocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+
+    def collection(self, name):
+        return _Collection(self._store, f"{self.path}/{name}")
+
+    @property
+    def id(self):
+        return self.path.rsplit("/", 1)[-1]
+
+    def get(self, field_paths=None):
+        self._store.reads += 1
+        data = self._store.docs.get(self.path)
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        return _Snapshot(data)
+
+    def set(self, data, merge=False):
+        self._store.writes += 1
+        base = self._store.docs.get(self.path, {}) if merge else {}
+        self._store.docs[self.path] = {**base, **data}
+
+    def update(self, data):
+        self._store.writes += 1
+        self._store.docs[self.path] = {**self._store.docs[self.path], **data}
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return _DocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class _Batch:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self._ops.append(lambda: ref.update(data))
+
+    def commit(self):
+        self._store.commits += 1
+        for op in self._ops:
+            op()
+
+
+class _DB:
+    def __init__(self):
+        self.docs = {}
+        self.reads = self.writes = self.commits = 0
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+    def batch(self):
+        return _Batch(self)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+
+def test_import_with_transcript_commits_session_writes_in_one_batch(monkeypatch):
+    store = _DB()
+    monkeypatch.setattr(imports, "db", store)
+    monkeypatch.setattr(sessions, "db", store)
+    monkeypatch.setattr(imports, "is_feature_enabled", lambda name: True)
+    enqueued = []
+    monkeypatch.setattr(imports, "enqueue_summarize_task", lambda sid, **kw: enqueued.append(("summary", sid)))
+    monkeypatch.setattr(imports, "enqueue_quiz_task", lambda sid, **kw: enqueued.append(("quiz", sid)))
+    user = CurrentUser(uid="u1", account_id="acc1", provider="google.com", phone_number=None, email=None)
+    req = ImportYouTubeRequest(url="https://youtu.be/dQw4w9WgXcQ", transcriptText="hello")
+
+    res = asyncio.run(imports.import_youtube(req=req, current_user=user))
+
+    sid = res.sessionId
+    assert store.commits == 1
+    assert store.docs[f"sessions/{sid}"]["sourceVideoId"] == "dQw4w9WgXcQ"
+    assert store.docs[f"sessions/{sid}"]["participants"]["u1"]["role"] == "owner"
+    assert store.docs[f"users/u1/sessionMeta/{sid}"]["role"] == "OWNER"
+    assert store.docs[f"session_members/{sid}_u1"]["role"] == "owner"
+    assert enqueued == [("summary", sid), ("quiz", sid)]
+
+
+def test_imported_transcript_is_ready_in_asset_manifest(monkeypatch):
+    from app.routes import assets
+    from app.util_models import AssetStatus
+
+    store = _DB()
+    for module in (imports, sessions, assets):
+        monkeypatch.setattr(module, "db", store)
+    monkeypatch.setattr(assets, "_session_doc_ref", sessions._session_doc_ref)
+    monkeypatch.setattr(assets, "_derived_doc_ref", sessions._derived_doc_ref)
+    monkeypatch.setattr(imports, "is_feature_enabled", lambda name: True)
+    monkeypatch.setattr(imports, "enqueue_summarize_task", lambda sid, **kw: None)
+    monkeypatch.setattr(imports, "enqueue_quiz_task", lambda sid, **kw: None)
+    user = CurrentUser(uid="u1", account_id="acc1", provider="google.com", phone_number=None, email=None)
+    req = ImportYouTubeRequest(url="https://youtu.be/dQw4w9WgXcQ", transcriptText="hello")
+
+    sid = asyncio.run(imports.import_youtube(req=req, current_user=user)).sessionId
+    reads = store.reads
+    manifest = asyncio.run(assets.get_session_assets(sid, current_user=user))
+
+    assert manifest.transcript.status == AssetStatus.READY
+    assert store.reads - reads == 3  # session projection + 2 derived docs, no transcriptText fallback
+
+
+def test_format_transcript_skips_blank_and_missing_text():
+    items = [{"text": " hello "}, {"text": None}, {}, {"text": "  "}, {"text": "world"}]
+
+    assert imports._format_transcript(items) == "hello\nworld"
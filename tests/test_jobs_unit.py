@@ -0,0 +1,216 @@
+"""Unit tests for the async job helpers in app.routes.jobs."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.dependencies import CurrentUser
+from app.routes import jobs
+from fastapi import HTTPException
+
+from app.util_models import AsyncJobStatus, AsyncJobType, GenerateRequest
+
+
+# ──────────────────────────────────────────────────────────────────────
+# In-memory Firestore stand-in
+# ──────────────────────────────────────────────────────────────────────
+
+class _FirestoreModule:
+    SERVER_TIMESTAMP = "SERVER_TIMESTAMP"
+
+    @staticmethod
+    def transactional(fn):
+        def run(transaction, *args, **kwargs):
+            result = fn(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+        return run
+
+
+class _Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _DocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def get(self, field_paths=None, transaction=None):
+        self._store.reads.append(self.path)
+        data = self._store.docs.get(self.path)
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        return _Snapshot(data)
+
+    def set(self, data, merge=False):
+        base = self._store.docs.get(self.path, {}) if merge else {}
+        self._store.docs[self.path] = {**base, **data}
+
+    def update(self, data):
+        self._store.docs[self.path] = {**self._store.docs[self.path], **data}
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return _DocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class _Transaction:
+    def __init__(self):
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self._ops.append(lambda: ref.update(data))
+
+    def commit(self):
+        for op in self._ops:
+            op()
+
+
+class _DB:
+    def __init__(self):
+        self.docs = {}
+        self.reads = []
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+    def transaction(self):
+        return _Transaction()
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    store = _DB()
+    monkeypatch.setattr(jobs, "db", store)
+    monkeypatch.setattr(jobs, "firestore", _FirestoreModule)
+    return store
+
+
+def _get_or_create(key="k1"):
+    return jobs._get_or_create_job(
+        idempotency_key=key,
+        session_id="s1",
+        job_type=AsyncJobType.SUMMARY,
+        user_id="u1",
+        account_id="acc1",
+    )
+
+
+def _baseline_key(session_id, job_type, account_id, params):
+    params_str = str(sorted(params.items())) if params else ""
+    return hashlib.sha256(f"{session_id}:{job_type}:{account_id}:{params_str}".encode()).hexdigest()[:32]
+
+
+def test_idempotency_key_is_order_independent_and_keeps_existing_format():
+    params = {"promptVersion": "v2", "mode": "lecture", "language": None}
+    key = jobs._compute_idempotency_key("s1", "summary", "acc1", params)
+
+    assert key == jobs._compute_idempotency_key("s1", "summary", "acc1", dict(reversed(list(params.items()))))
+    assert key == _baseline_key("s1", "summary", "acc1", params)
+    assert key != jobs._compute_idempotency_key("s1", "quiz", "acc1", params)
+    assert jobs._compute_idempotency_key("s1", "summary", "acc1", None) == _baseline_key("s1", "summary", "acc1", None)
+
+
+def test_legacy_key_doc_still_reads_job(fake_db):
+    fake_db.docs["job_keys/k1"] = {"jobId": "j_old"}
+    fake_db.docs["jobs/j_old"] = {"id": "j_old", "status": AsyncJobStatus.SUCCEEDED.value}
+
+    job_id, job_data, is_new = _get_or_create()
+
+    assert (job_id, is_new) == ("j_old", False)
+    assert job_data["status"] == AsyncJobStatus.SUCCEEDED.value
+
+
+def test_reuse_follows_worker_status_on_job_doc(fake_db):
+    job_id, _, _ = _get_or_create()
+
+    # Workers only touch jobs/{id} (task_queue._update_root_job_status)
+    fake_db.docs[f"jobs/{job_id}"].update({"status": "succeeded", "completedAt": datetime.now(timezone.utc)})
+    again_id, job_data, is_new = _get_or_create()
+    assert (again_id, is_new) == (job_id, False)
+    assert job_data["status"] == AsyncJobStatus.SUCCEEDED.value
+
+
+def test_failed_job_is_regenerated_after_retry_window(fake_db):
+    job_id, _, _ = _get_or_create()
+    fake_db.docs[f"jobs/{job_id}"].update({
+        "status": "failed",
+        "completedAt": datetime.now(timezone.utc) - timedelta(minutes=5),
+    })
+
+    new_id, job_data, is_new = _get_or_create()
+
+    assert is_new is True and new_id != job_id
+    assert job_data["status"] == AsyncJobStatus.QUEUED.value
+    assert fake_db.docs["job_keys/k1"]["jobId"] == new_id
+
+
+def _user(uid="u1", account_id="acc1"):
+    return CurrentUser(uid=uid, account_id=account_id, provider="google.com", phone_number=None, email=None)
+
+
+def test_job_status_reads_only_response_fields(fake_db):
+    job_id, _, _ = _get_or_create()
+    fake_db.docs[f"jobs/{job_id}"]["partial"] = {"tldr": ["short"]}
+
+    res = asyncio.run(jobs.get_job_status(job_id=job_id, current_user=_user()))
+
+    assert res.jobId == job_id
+    assert res.status == AsyncJobStatus.QUEUED
+    assert res.partial.tldr == ["short"]
+
+
+@pytest.mark.parametrize("handler, enqueue_name, job_type, estimate", [
+    (jobs.generate_summary, "enqueue_summarize_task", AsyncJobType.SUMMARY, 30),
+    (jobs.generate_quiz, "enqueue_quiz_task", AsyncJobType.QUIZ, 45),
+])
+def test_generate_queues_once_then_reuses(fake_db, monkeypatch, handler, enqueue_name, job_type, estimate):
+    fake_db.docs["sessions/s1"] = {"ownerAccountId": "acc1", "transcriptText": "x" * 1000}
+    queued = []
+    monkeypatch.setattr(jobs, enqueue_name, lambda **kw: queued.append(kw["job_id"]))
+
+    first = asyncio.run(handler(session_id="s1", body=GenerateRequest(), current_user=_user()))
+    second = asyncio.run(handler(session_id="s1", body=GenerateRequest(), current_user=_user()))
+
+    assert first.estimatedSeconds == estimate and second.estimatedSeconds is None
+    assert first.jobId == second.jobId == queued[0] and len(queued) == 1
+    assert fake_db.docs[f"jobs/{first.jobId}"]["type"] == job_type.value
+
+
+def test_generate_rejects_other_accounts(fake_db):
+    fake_db.docs["sessions/s1"] = {"ownerAccountId": "acc1", "ownerUserId": "u1"}
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(jobs.generate_summary(session_id="s1", body=GenerateRequest(), current_user=_user("u2", "acc2")))
+
+    assert excinfo.value.status_code == 403
+
+
+def test_progress_tick_does_not_touch_lease(fake_db):
+    job_id, _, _ = _get_or_create()
+    started = jobs.start_job(job_id)
+
+    jobs.update_job_progress(job_id, 0.5)
+
+    job = fake_db.docs[f"jobs/{job_id}"]
+    assert job["progress"] == 0.5
+    assert job["leaseUntil"] == started["leaseUntil"]
+    assert job["status"] == AsyncJobStatus.RUNNING.value
@@ -0,0 +1,63 @@
+"""Unit tests for the Twilio SMS sender in app.routes.phone."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.routes import phone
+
+
+class _Messages:
+    def __init__(self, sent):
+        self._sent = sent
+
+    def create(self, body, from_, to):
+        self._sent.append((body, from_, to))
+        return SimpleNamespace(sid=f"SM{len(self._sent)}")
+
+
+@pytest.fixture
+def twilio(monkeypatch):
+    clients = []
+    sent = []
+
+    def _client(sid, token):
+        client = SimpleNamespace(credentials=(sid, token), messages=_Messages(sent))
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(phone, "TwilioClient", _client)
+    monkeypatch.delenv("SKIP_SMS_VERIFICATION", raising=False)
+    monkeypatch.setenv("TWILIO_ACCOUNT_SID", "AC1")
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "tok")
+    monkeypatch.setenv("TWILIO_PHONE_NUMBER", "+15550000000")
+    phone._twilio_client.cache_clear()
+    yield SimpleNamespace(clients=clients, sent=sent)
+    phone._twilio_client.cache_clear()
+
+
+def test_send_sms_reuses_one_client(twilio):
+    assert asyncio.run(phone._send_sms("+819012345678", "123456")) is True
+    assert asyncio.run(phone._send_sms("+819012345679", "654321")) is True
+
+    assert len(twilio.clients) == 1
+    assert [to for _, _, to in twilio.sent] == ["+819012345678", "+819012345679"]
+
+
+def test_send_sms_rebuilds_client_when_credentials_change(twilio, monkeypatch):
+    asyncio.run(phone._send_sms("+819012345678", "123456"))
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "rotated")
+    asyncio.run(phone._send_sms("+819012345678", "123456"))
+
+    assert [c.credentials for c in twilio.clients] == [("AC1", "tok"), ("AC1", "rotated")]
+
+
+def test_send_sms_reports_provider_failure(twilio, monkeypatch):
+    def _boom(**kwargs):
+        raise RuntimeError("twilio down")
+
+    monkeypatch.setattr(_Messages, "create", lambda self, **kwargs: _boom(**kwargs))
+
+    assert asyncio.run(phone._send_sms("+819012345678", "123456")) is False